@@ -0,0 +1,67 @@
+from datetime import datetime, time, timedelta
+
+from django import forms
+from django.utils import timezone
+
+from orders.models import OrderStatus
+
+ORDER_SORTS = {
+    'newest': ('-created_at', '-id'),
+    'oldest': ('created_at', 'id'),
+    'total_desc': ('-total_amount', '-id'),
+    'total_asc': ('total_amount', 'id'),
+}
+
+
+class OrderFilterForm(forms.Form):
+    status = forms.ChoiceField(choices=[('', 'All statuses')] + OrderStatus.choices, required=False)
+    date_from = forms.DateField(required=False, widget=forms.DateInput(attrs={'type': 'date'}))
+    date_to = forms.DateField(required=False, widget=forms.DateInput(attrs={'type': 'date'}))
+    customer = forms.CharField(
+        required=False, max_length=255, widget=forms.TextInput(attrs={'placeholder': 'Username (registration email)'})
+    )
+    sort = forms.ChoiceField(
+        choices=[
+            ('newest', 'Newest first'), ('oldest', 'Oldest first'),
+            ('total_desc', 'Highest total'), ('total_asc', 'Lowest total'),
+        ],
+        required=False,
+    )
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        for visible in self.visible_fields():
+            widget = visible.field.widget
+            widget.attrs['class'] = 'form-select form-select-sm' if isinstance(widget, forms.Select) else 'form-control form-control-sm'
+
+    def clean(self):
+        cleaned_data = super().clean()
+        date_from, date_to = cleaned_data.get('date_from'), cleaned_data.get('date_to')
+        if date_from and date_to and date_from > date_to:
+            raise forms.ValidationError('"From" date must not be after the "To" date.')
+        return cleaned_data
+
+    @property
+    def ordering(self):
+        sort = self.cleaned_data.get('sort') if self.is_valid() else None
+        return ORDER_SORTS[sort or 'newest']
+
+    def _day_start(self, day):
+        return timezone.make_aware(datetime.combine(day, time.min))
+
+    def filter_orders(self, queryset):
+        # Filters compare raw columns (no __date casts) so the status/created_at
+        # and status/total_amount composite indexes stay usable.
+        if not self.is_valid():
+            return queryset
+        data = self.cleaned_data
+        if data['status']:
+            queryset = queryset.filter(status=data['status'])
+        if data['date_from']:
+            queryset = queryset.filter(created_at__gte=self._day_start(data['date_from']))
+        if data['date_to']:
+            queryset = queryset.filter(created_at__lt=self._day_start(data['date_to'] + timedelta(days=1)))
+        if data['customer']:
+            # Case-sensitive prefix match so the unique username index serves it.
+            queryset = queryset.filter(user__username__startswith=data['customer'].strip())
+        return queryset
@@ -1,7 +1,7 @@
 from django.urls import path
 
 from users.views import admin_login, admin_logout
-from adminpanel.views import dashboard, admin_404, orders, customers, products, product_create, product_update, product_delete, product_status_change, order_status_change
+from adminpanel.views import dashboard, sales_chart, admin_404, orders, orders_data, customers, products, product_create, product_update, product_delete, product_status_change, order_status_change
 
 app_name = 'adminpanel'
 
@@ -9,7 +9,9 @@ urlpatterns = [
     path('login/', admin_login, name='login'),
     path('logout/', admin_logout, name='logout'),
     path('dashboard/', dashboard, name='dashboard'),
+    path('dashboard/sales/', sales_chart, name='sales_chart'),
     path('orders/', orders, name='orders'),
+    path('orders/data/', orders_data, name='orders_data'),
     path('orders/status_change/', order_status_change, name='order_status_change'),
     path('customers/', customers, name='customers'),
     path('products/', products, name='products'),
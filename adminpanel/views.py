@@ -3,14 +3,20 @@ import logging
 
 from django.shortcuts import render, redirect
 from django.contrib.auth.decorators import login_required, user_passes_test
-from django.db.models import Sum, Avg
 from django.contrib import messages
 from django.http import JsonResponse
+from django.utils import timezone
+from django.utils.formats import date_format
 
+from orders.archive import order_history
+from orders.jobs import enqueue
 from orders.models import Order, OrderStatus
+from orders.rollups import CHART_RANGES, sales_series, sales_totals
 from users.models import User
 from shop.models import Product
 from shop.forms import ProductForm
+from shop.pagination import KeysetPaginator, MergedKeysetPaginator, get_page_size
+from adminpanel.forms import OrderFilterForm
 
 logger = logging.getLogger('adminpanel')
 
@@ -19,34 +25,72 @@ logger = logging.getLogger('adminpanel')
 @user_passes_test(lambda user: user.is_staff, login_url='adminpanel:admin_404', redirect_field_name=None)
 def dashboard(request):
     logger.info(f"Admin dashboard accessed by: {request.user.email}")
-    total_orders = Order.objects.count()
-    total_revenue = Order.objects.aggregate(Sum('total_amount'))['total_amount__sum']
-    total_customers = User.objects.filter(is_staff=False).count()
-    total_products = Product.objects.filter(is_deleted=False).count()
-    recent_orders = Order.objects.order_by('-created_at')[:5]
+    totals = sales_totals()
+    recent_orders = Order.objects.select_related('user').order_by('-created_at', '-id')[:5]
     context = {
-        'total_orders': total_orders,
-        'total_revenue': total_revenue,
-        'total_customers': total_customers,
-        'total_products': total_products,
+        'total_orders': totals.order_count,
+        'total_revenue': totals.revenue,
+        'total_customers': totals.customer_count,
+        'total_products': totals.product_count,
         'recent_orders': recent_orders,
+        'chart_ranges': list(CHART_RANGES),
     }
     return render(request, 'adminpanel/dashboard.html', context)
 
 
+@login_required(login_url='adminpanel:login')
+@user_passes_test(lambda user: user.is_staff, login_url='adminpanel:admin_404', redirect_field_name=None)
+def sales_chart(request):
+    chart_range = request.GET.get('range', 'day')
+    if chart_range not in CHART_RANGES:
+        return JsonResponse({'error': f'Unknown range: {chart_range}'}, status=400)
+    return JsonResponse({'range': chart_range, 'series': sales_series(chart_range)})
+
+
 @login_required(login_url='adminpanel:login')
 @user_passes_test(lambda user: user.is_staff, login_url='adminpanel:admin_404', redirect_field_name=None)
 def orders(request):
-    orders = Order.objects.all()
+    form, page = _order_grid_page(request)
     order_status_choices = [(status, label) for status, label in OrderStatus.choices]
-    logger.info(f"Admin orders list viewed by: {request.user.email}, count={orders.count()}")
+    logger.info(f"Admin orders list viewed by: {request.user.email}, filters={form.data.dict()}, page_count={len(page)}")
     context = {
-        'orders': orders,
+        'orders': page,
+        'page': page,
+        'form': form,
         'order_status_choices': order_status_choices,
     }
     return render(request, 'adminpanel/orders.html', context)
 
 
+@login_required(login_url='adminpanel:login')
+@user_passes_test(lambda user: user.is_staff, login_url='adminpanel:admin_404', redirect_field_name=None)
+def orders_data(request):
+    form, page = _order_grid_page(request)
+    if form.errors:
+        return JsonResponse({'errors': form.errors}, status=400)
+    rows = [
+        {
+            'id': order.id,
+            'customer': order.user.username,
+            'status': order.status,
+            'status_label': order.get_status_display(),
+            'created_at': date_format(timezone.localtime(order.created_at), 'DATETIME_FORMAT'),
+            'total_amount': str(order.total_amount),
+            'is_archived': getattr(order, 'is_archived', False),
+        }
+        for order in page
+    ]
+    return JsonResponse({'rows': rows, 'next_cursor': page.next_cursor})
+
+
+def _order_grid_page(request):
+    form = OrderFilterForm(request.GET)
+    hot, cold = (form.filter_orders(queryset).select_related('user') for queryset in order_history())
+    page_size = get_page_size(request.GET.get('page_size'))
+    page = MergedKeysetPaginator([hot, cold], form.ordering, page_size).get_page(request.GET.get('cursor'))
+    return form, page
+
+
 @login_required(login_url='adminpanel:login')
 @user_passes_test(lambda user: user.is_staff, login_url='adminpanel:admin_404', redirect_field_name=None)
 def order_status_change(request):
@@ -59,6 +103,8 @@ def order_status_change(request):
             old_status = order.status
             order.status = status
             order.save()
+            if old_status != status:
+                enqueue('orders.send_status_update', {'order_id': order.id, 'old_status': old_status, 'new_status': status})
             logger.info(f"Order status changed: order_id={order_id}, old_status={old_status}, new_status={status}, admin={request.user.email}")
             return JsonResponse({'status': order.get_status_display()}, status=200)
         except Order.DoesNotExist:
@@ -71,10 +117,11 @@ def order_status_change(request):
 @login_required(login_url='adminpanel:login')
 @user_passes_test(lambda user: user.is_staff, login_url='adminpanel:admin_404', redirect_field_name=None)
 def customers(request):
-    customers = User.objects.filter(is_staff=False)
-    logger.info(f"Admin customers list viewed by: {request.user.email}, count={customers.count()}")
+    page = KeysetPaginator(User.objects.filter(is_staff=False), ('-date_joined', '-id')).get_page(request.GET.get('cursor'))
+    logger.info(f"Admin customers list viewed by: {request.user.email}, page_count={len(page)}")
     context = {
-        'customers': customers,
+        'customers': page,
+        'page': page,
     }
     return render(request, 'adminpanel/customers.html', context)
 
@@ -82,10 +129,11 @@ def customers(request):
 @login_required(login_url='adminpanel:login')
 @user_passes_test(lambda user: user.is_staff, login_url='adminpanel:admin_404', redirect_field_name=None)
 def products(request):
-    products = Product.objects.filter(is_deleted=False).annotate(avg_rating=Avg('ratings__rating'))
-    logger.info(f"Admin products list viewed by: {request.user.email}, count={products.count()}")
+    page = KeysetPaginator(Product.objects.filter(is_deleted=False), ('-created_at', '-id')).get_page(request.GET.get('cursor'))
+    logger.info(f"Admin products list viewed by: {request.user.email}, page_count={len(page)}")
     context = {
-        'products': products,
+        'products': page,
+        'page': page,
     }
     return render(request, 'adminpanel/products.html', context)
 
@@ -122,7 +170,9 @@ def product_update(request, product_id):
     if request.method == 'POST':
         form = ProductForm(request.POST, request.FILES, instance=product)
         if form.is_valid():
-            form.save()
+            # Only the edited columns are written so reservation and rating
+            # counters maintained elsewhere are not overwritten.
+            form.save(commit=False).save(update_fields=[*form.Meta.fields, 'updated_at'])
             logger.info(f"Product updated: product_id={product_id}, product_name={product.name}, admin={request.user.email}")
             messages.success(request, 'Product updated successfully')
             return redirect('adminpanel:products')
@@ -143,7 +193,7 @@ def product_status_change(request, product_id):
         product = Product.objects.get(id=product_id, is_deleted=False)
         old_status = product.is_active
         product.is_active = not product.is_active
-        product.save()
+        product.save(update_fields=['is_active', 'updated_at'])
         logger.info(f"Product status changed: product_id={product_id}, old_status={old_status}, new_status={product.is_active}, admin={request.user.email}")
         messages.success(request, 'Product status changed successfully')
         return redirect('adminpanel:products')
@@ -160,7 +210,7 @@ def product_delete(request, product_id):
         product = Product.objects.get(id=product_id, is_deleted=False)
         product.is_deleted = True
         product.is_active = False
-        product.save()
+        product.save(update_fields=['is_deleted', 'is_active', 'updated_at'])
         logger.info(f"Product deleted: product_id={product_id}, product_name={product.name}, admin={request.user.email}")
         messages.success(request, 'Product deleted successfully')
         return redirect('adminpanel:products')
@@ -0,0 +1,85 @@
+import copy
+import threading
+import time
+from collections import OrderedDict
+
+from django.utils.translation import gettext_lazy as _
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+from shop.cache import invalidate_tags, tag_versions
+
+USER_CACHE_TTL = 300
+USER_CACHE_SIZE = 1024
+
+
+def user_tag(user_id):
+    return f'user:{user_id}'
+
+
+class UserCache:
+    # Entries live in this process, but every hit is checked against the user's
+    # version in the shared cache; saves and deletes bump it for all workers.
+    def __init__(self, maxsize=USER_CACHE_SIZE, ttl=USER_CACHE_TTL):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, user_id):
+        key = str(user_id)
+        tag = user_tag(user_id)
+        version = tag_versions([tag])[tag]
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None, version
+            if entry[1] != version or time.monotonic() - entry[2] > self.ttl:
+                del self._entries[key]
+                return None, version
+            self._entries.move_to_end(key)
+            return copy.copy(entry[0]), version
+
+    def set(self, user_id, version, user):
+        key = str(user_id)
+        with self._lock:
+            self._entries[key] = (copy.copy(user), version, time.monotonic())
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, user_id):
+        invalidate_tags(user_tag(user_id))
+        with self._lock:
+            self._entries.pop(str(user_id), None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+user_cache = UserCache()
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    def get_user(self, validated_token):
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError as e:
+            raise InvalidToken(_('Token contained no recognizable user identification')) from e
+
+        user, version = user_cache.get(user_id)
+        if user is None:
+            user = super().get_user(validated_token)
+            user_cache.set(user_id, version, user)
+            return user
+
+        if api_settings.CHECK_USER_IS_ACTIVE and not user.is_active:
+            raise AuthenticationFailed(_('User is inactive'), code='user_inactive')
+        if api_settings.CHECK_REVOKE_TOKEN:
+            if validated_token.get(api_settings.REVOKE_TOKEN_CLAIM) != get_md5_hash_password(user.password):
+                raise AuthenticationFailed(_("The user's password has been changed."), code='password_changed')
+        return user
@@ -0,0 +1,127 @@
+import json
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+
+from django.db import close_old_connections
+from django.test.client import RequestFactory
+from django.urls import Resolver404, resolve
+
+logger = logging.getLogger('api')
+
+MAX_BATCH_SIZE = 20
+MAX_CONCURRENCY = 4
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+ALLOWED_METHODS = SAFE_METHODS + ('POST', 'PUT', 'PATCH', 'DELETE')
+FORWARDED_HEADERS = (
+    'HTTP_HOST', 'SERVER_NAME', 'SERVER_PORT', 'HTTP_ACCEPT', 'HTTP_ACCEPT_LANGUAGE', 'HTTP_USER_AGENT', 'REMOTE_ADDR',
+)
+RETURNED_HEADERS = ('Content-Type', 'ETag', 'Last-Modified', 'Idempotent-Replayed')
+
+
+class BatchError(Exception):
+    pass
+
+
+def parse_operations(data):
+    operations = data.get('requests') if isinstance(data, dict) else None
+    if not isinstance(operations, list) or not operations:
+        raise BatchError('Expected a non-empty "requests" list.')
+    if len(operations) > MAX_BATCH_SIZE:
+        raise BatchError(f'A batch may contain at most {MAX_BATCH_SIZE} requests.')
+    parsed = []
+    for index, operation in enumerate(operations):
+        if not isinstance(operation, dict) or not isinstance(operation.get('path'), str):
+            raise BatchError(f'Request {index} must be an object with a "path".')
+        method = str(operation.get('method', 'GET')).upper()
+        if method not in ALLOWED_METHODS:
+            raise BatchError(f'Request {index} uses unsupported method {method}.')
+        headers = operation.get('headers') or {}
+        if not isinstance(headers, dict):
+            raise BatchError(f'Request {index} headers must be an object.')
+        parsed.append({'method': method, 'path': operation['path'], 'body': operation.get('body'), 'headers': headers})
+    return parsed
+
+
+def _build_request(parent, operation):
+    meta = {name: parent.META[name] for name in FORWARDED_HEADERS if name in parent.META}
+    for name, value in operation['headers'].items():
+        if name.lower() not in ('authorization', 'cookie'):
+            meta[f"HTTP_{name.upper().replace('-', '_')}"] = str(value)
+    factory = RequestFactory(**meta)
+    body = operation['body']
+    secure = parent.is_secure()
+    if operation['method'] in SAFE_METHODS:
+        request = factory.generic(operation['method'], operation['path'], secure=secure)
+    else:
+        data = json.dumps(body) if body is not None else ''
+        request = factory.generic(
+            operation['method'], operation['path'], data, content_type='application/json', secure=secure
+        )
+    # The batch request already went through authentication; sub-requests reuse its result.
+    request.user = parent.user
+    if parent.user.is_authenticated:
+        request._force_auth_user = parent.user
+        request._force_auth_token = parent.auth
+    return request
+
+
+def _response_body(response):
+    content_type = response.get('Content-Type', '')
+    content = response.content.decode(response.charset or 'utf-8')
+    if content and 'json' in content_type:
+        return json.loads(content)
+    return content
+
+
+def _dispatch(parent, operation):
+    try:
+        match = resolve(urlsplit(operation['path']).path)
+    except Resolver404:
+        match = None
+    if match is None or match.namespace != 'api' or match.url_name == 'batch':
+        return {'status': 404, 'headers': {}, 'body': {'detail': 'Not found.'}}
+    try:
+        response = match.func(_build_request(parent, operation), *match.args, **match.kwargs)
+        if response.streaming:
+            return {'status': 400, 'headers': {}, 'body': {'detail': 'Streaming endpoints cannot be batched.'}}
+        if hasattr(response, 'render'):
+            response.render()
+        headers = {name: response[name] for name in RETURNED_HEADERS if response.has_header(name)}
+        return {'status': response.status_code, 'headers': headers, 'body': _response_body(response)}
+    except Exception:
+        logger.exception(f"API batch sub-request failed: {operation['method']} {operation['path']}")
+        return {'status': 500, 'headers': {}, 'body': {'detail': 'Internal server error.'}}
+
+
+def _dispatch_in_thread(parent, operation):
+    try:
+        return _dispatch(parent, operation)
+    finally:
+        close_old_connections()
+
+
+def run_batch(parent, operations):
+    # Consecutive read-only requests run concurrently; writes run one at a time
+    # on the calling thread, in order, so later reads observe earlier writes.
+    results = [None] * len(operations)
+    pending = []
+
+    def flush(executor):
+        if len(pending) == 1:
+            index = pending[0]
+            results[index] = _dispatch(parent, operations[index])
+        elif pending:
+            for index, result in zip(pending, executor.map(lambda i: _dispatch_in_thread(parent, operations[i]), pending)):
+                results[index] = result
+        pending.clear()
+
+    with ThreadPoolExecutor(max_workers=MAX_CONCURRENCY) as executor:
+        for index, operation in enumerate(operations):
+            if operation['method'] in SAFE_METHODS:
+                pending.append(index)
+                continue
+            flush(executor)
+            results[index] = _dispatch(parent, operation)
+        flush(executor)
+    return results
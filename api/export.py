@@ -0,0 +1,67 @@
+import csv
+import json
+
+from django.utils.dateparse import parse_datetime
+from django.utils import timezone
+
+from api.fast_serializers import MediaUrls, datetime_string, decimal_string
+from shop.models import Product
+
+EXPORT_CHUNK_SIZE = 2000
+EXPORT_FIELDS = ['id', 'name', 'description', 'price', 'image', 'stock', 'avg_rating', 'available', 'updated_at']
+EXPORT_COLUMNS = [
+    'id', 'name', 'description', 'price', 'image', 'image_variants', 'stock', 'rating_avg', 'is_active', 'is_deleted',
+    'updated_at',
+]
+
+
+class Echo:
+    def write(self, value):
+        return value
+
+
+def parse_updated_since(value):
+    if not value:
+        return None
+    parsed = parse_datetime(value)
+    if parsed is None:
+        raise ValueError(f'Invalid updated_since timestamp: {value!r}')
+    if timezone.is_naive(parsed):
+        parsed = timezone.make_aware(parsed)
+    return parsed
+
+
+def export_rows(request, updated_since=None, chunk_size=EXPORT_CHUNK_SIZE):
+    # Full exports list the sellable catalogue; incremental ones also carry
+    # products that were deactivated or deleted so partners can drop them.
+    products = Product.objects.all()
+    if updated_since is None:
+        products = products.filter(is_active=True, is_deleted=False).order_by('id')
+    else:
+        products = products.filter(updated_at__gt=updated_since).order_by('updated_at', 'id')
+    media = MediaUrls(request)
+    for row in products.values_list(*EXPORT_COLUMNS).iterator(chunk_size=chunk_size):
+        pk, name, description, price, image, variants, stock, rating_avg, is_active, is_deleted, updated_at = row
+        yield {
+            'id': pk,
+            'name': name,
+            'description': description,
+            'price': decimal_string(price),
+            'image': media.variant(image, variants, 'medium'),
+            'stock': stock,
+            'avg_rating': rating_avg or 0,
+            'available': is_active and not is_deleted,
+            'updated_at': datetime_string(updated_at),
+        }
+
+
+def jsonl_stream(rows):
+    for row in rows:
+        yield json.dumps(row, ensure_ascii=False, separators=(',', ':')) + '\n'
+
+
+def csv_stream(rows):
+    writer = csv.writer(Echo())
+    yield writer.writerow(EXPORT_FIELDS)
+    for row in rows:
+        yield writer.writerow([row[field] if row[field] is not None else '' for field in EXPORT_FIELDS])
@@ -0,0 +1,185 @@
+from decimal import Decimal
+
+from django.core.files.storage import default_storage
+from django.db.models import BooleanField, Value
+from django.utils import timezone
+from django.utils.encoding import filepath_to_uri
+
+from orders.models import ArchivedOrderItem, OrderItem, OrderStatus
+from users.models import Address
+
+# Column-level serializers producing exactly what ProductListSerializer,
+# OrderListSerializer and OrderSummarySerializer return, from .values() rows.
+
+CENTS = Decimal('0.01')
+STATUS_LABELS = dict(OrderStatus.choices)
+ADDRESS_FIELDS = ['id', 'address_line_1', 'address_line_2', 'city', 'state', 'zip_code']
+PRODUCT_FIELD_COLUMNS = {
+    'id': ['id'],
+    'name': ['name'],
+    'description': ['description'],
+    'price': ['price'],
+    'image': ['image', 'image_variants'],
+    'stock': ['stock'],
+    'avg_rating': ['rating_avg'],
+}
+PRODUCT_FIELDS = list(PRODUCT_FIELD_COLUMNS)
+PRODUCT_COLUMNS = [column for columns in PRODUCT_FIELD_COLUMNS.values() for column in columns]
+ORDER_COLUMNS = [
+    'id', 'address_id', 'status', 'total_amount', 'created_at', 'item_count', 'first_item_name',
+    'first_item_image', 'shipping_address',
+]
+ITEM_COLUMNS = [
+    'id', 'order_id', 'quantity', 'price', 'product_id', 'product__name', 'product__price', 'product__image',
+    'product__image_variants',
+]
+
+
+def decimal_string(value):
+    return f'{value.quantize(CENTS):f}'
+
+
+def datetime_string(value):
+    value = timezone.localtime(value).isoformat()
+    if value.endswith('+00:00'):
+        value = value[:-6] + 'Z'
+    return value
+
+
+class MediaUrls:
+    # Resolves the absolute media base once per request; per-row URLs are
+    # plain string concatenation after that.
+    def __init__(self, request):
+        self.base = request.build_absolute_uri(default_storage.base_url)
+
+    def url(self, name):
+        return self.base + filepath_to_uri(name).lstrip('/')
+
+    def variant(self, image, variants, size):
+        if not image:
+            return None
+        if variants and variants.get('source') == image:
+            return self.url(variants[size]['jpeg'])
+        return self.url(image)
+
+
+def _extra_columns(columns, ordering, extra):
+    names = [name.lstrip('-') for name in ordering] + list(extra)
+    return list(dict.fromkeys(name for name in names if name not in columns))
+
+
+def product_columns(fields=PRODUCT_FIELDS):
+    return [column for field in fields for column in PRODUCT_FIELD_COLUMNS[field]]
+
+
+def product_values(queryset, ordering=(), extra=(), fields=PRODUCT_FIELDS):
+    columns = product_columns(fields)
+    return queryset.values(*columns, *_extra_columns(columns, ordering, extra))
+
+
+def serialize_products(rows, request, fields=PRODUCT_FIELDS):
+    media = MediaUrls(request)
+    if list(fields) == PRODUCT_FIELDS:
+        return [
+            {
+                'id': row['id'],
+                'name': row['name'],
+                'description': row['description'],
+                'price': decimal_string(row['price']),
+                'image': media.variant(row['image'], row['image_variants'], 'medium'),
+                'stock': row['stock'],
+                'avg_rating': row['rating_avg'] or 0,
+            }
+            for row in rows
+        ]
+    builders = {
+        'id': lambda row: row['id'],
+        'name': lambda row: row['name'],
+        'description': lambda row: row['description'],
+        'price': lambda row: decimal_string(row['price']),
+        'image': lambda row: media.variant(row['image'], row['image_variants'], 'medium'),
+        'stock': lambda row: row['stock'],
+        'avg_rating': lambda row: row['rating_avg'] or 0,
+    }
+    selected = [(field, builders[field]) for field in fields]
+    return [{field: build(row) for field, build in selected} for row in rows]
+
+
+def order_values(queryset, archived=False, ordering=()):
+    columns = [column for column in ORDER_COLUMNS if not (archived and column == 'address_id')]
+    columns += _extra_columns(columns, ordering, ())
+    return queryset.values(*columns).annotate(is_archived=Value(archived, output_field=BooleanField()))
+
+
+def _addresses(rows):
+    ids = {row['address_id'] for row in rows if not row['shipping_address'] and row.get('address_id')}
+    if not ids:
+        return {}
+    return {address['id']: address for address in Address.objects.filter(pk__in=ids).values(*ADDRESS_FIELDS)}
+
+
+def _address(row, addresses):
+    snapshot = row['shipping_address'] or addresses.get(row.get('address_id'), {})
+    return {field: snapshot.get(field) for field in ADDRESS_FIELDS}
+
+
+def _order_head(row, addresses):
+    return {
+        'id': row['id'],
+        'address': _address(row, addresses),
+        'status': STATUS_LABELS.get(row['status'], row['status']),
+        'total_amount': decimal_string(row['total_amount']),
+        'created_at': datetime_string(row['created_at']),
+    }
+
+
+def _order_items(rows):
+    hot = [row['id'] for row in rows if not row['is_archived']]
+    cold = [row['id'] for row in rows if row['is_archived']]
+    items = {}
+    for model, ids in ((OrderItem, hot), (ArchivedOrderItem, cold)):
+        if ids:
+            for item in model.objects.filter(order_id__in=ids).order_by('id').values(*ITEM_COLUMNS):
+                items.setdefault(item['order_id'], []).append(item)
+    return items
+
+
+def serialize_orders(rows, request):
+    media = MediaUrls(request)
+    addresses = _addresses(rows)
+    items = _order_items(rows)
+    data = []
+    for row in rows:
+        order = _order_head(row, addresses)
+        order['order_items'] = [
+            {
+                'id': item['id'],
+                'product': {
+                    'id': item['product_id'],
+                    'name': item['product__name'],
+                    'price': item['product__price'],
+                    'image': media.variant(item['product__image'], item['product__image_variants'], 'thumb'),
+                },
+                'quantity': item['quantity'],
+                'price': decimal_string(item['price']),
+                'subtotal': item['quantity'] * item['price'],
+            }
+            for item in items.get(row['id'], [])
+        ]
+        data.append(order)
+    return data
+
+
+def serialize_order_summaries(rows, request):
+    media = MediaUrls(request)
+    addresses = _addresses(rows)
+    data = []
+    for row in rows:
+        order = _order_head(row, addresses)
+        order['item_count'] = row['item_count']
+        order['first_item'] = {
+            'name': row['first_item_name'],
+            'image': media.url(row['first_item_image']) if row['first_item_image'] else None,
+        } if row['first_item_name'] else None
+        data.append(order)
+    return data
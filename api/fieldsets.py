@@ -0,0 +1,25 @@
+class FieldsetError(Exception):
+    pass
+
+
+def _names(value):
+    return [name.strip() for name in value.split(',') if name.strip()]
+
+
+def parse_fieldset(query_params, available):
+    selected = list(available)
+    for param in ('fields', 'exclude'):
+        value = query_params.get(param)
+        if not value:
+            continue
+        names = _names(value)
+        unknown = [name for name in names if name not in available]
+        if unknown:
+            raise FieldsetError(f"Unknown field(s) in {param}: {', '.join(unknown)}")
+        if param == 'fields':
+            selected = [name for name in selected if name in names]
+        else:
+            selected = [name for name in selected if name not in names]
+    if not selected:
+        raise FieldsetError('No fields left to return.')
+    return selected
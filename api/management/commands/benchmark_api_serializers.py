@@ -0,0 +1,124 @@
+import time
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import Count
+from django.test import RequestFactory
+from rest_framework.renderers import JSONRenderer
+
+from api.fast_serializers import (
+    order_values, product_values, serialize_order_summaries, serialize_orders, serialize_products,
+)
+from api.serializers import OrderListSerializer, OrderSummarySerializer, ProductListSerializer
+from orders.archive import order_history
+from orders.models import Order, OrderItem
+from shop.models import Product
+from shop.pagination import MAX_PAGE_SIZE
+from users.models import Address, User
+
+
+class Command(BaseCommand):
+    help = 'Compare rows/sec of the DRF serializers and the fast serialization path on the API list payloads'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--products', type=int, default=0, help='Create this many throwaway products first (rolled back)')
+        parser.add_argument('--orders', type=int, default=0, help='Create this many throwaway orders first (rolled back)')
+        parser.add_argument('--repeat', type=int, default=3)
+
+    def _seed(self, products, orders):
+        created = Product.objects.bulk_create([
+            Product(name=f'Benchmark product {i}', description='Benchmark ' * 20, price=Decimal('9.99') + i,
+                    image='products/benchmark.jpg', stock=100)
+            for i in range(max(products, 5 if orders else 0))
+        ])
+        if not orders:
+            return
+        user = User.objects.create(username='benchmark@example.com', email='benchmark@example.com', name='Benchmark')
+        address = Address.objects.create(user=user, address_line_1='1 Bench St', city='Bench', state='BS',
+                                         zip_code='00000', country='Benchland')
+        snapshot = {'id': address.id, 'address_line_1': '1 Bench St', 'address_line_2': None, 'city': 'Bench',
+                    'state': 'BS', 'zip_code': '00000', 'country': 'Benchland'}
+        placed = Order.objects.bulk_create([
+            Order(user=user, address=address, total_amount=Decimal('29.97'), item_count=3,
+                  first_item_name=created[0].name, first_item_image='products/benchmark.jpg', shipping_address=snapshot)
+            for _ in range(orders)
+        ])
+        OrderItem.objects.bulk_create([
+            OrderItem(order=order, product=created[(order.id + i) % len(created)], quantity=1, price=Decimal('9.99'))
+            for order in placed for i in range(3)
+        ])
+
+    def _time(self, label, rows, build, repeat):
+        best, payload = None, None
+        for _ in range(repeat):
+            started = time.perf_counter()
+            payload = JSONRenderer().render(build())
+            elapsed = time.perf_counter() - started
+            best = elapsed if best is None else min(best, elapsed)
+        rate = rows / best if best else 0
+        self.stdout.write(f'  {label:<6} {best * 1000:9.1f} ms  {rate:12,.0f} rows/sec')
+        return payload, best
+
+    def _compare(self, name, rows, slow, fast, repeat):
+        self.stdout.write(f'{name} ({rows} rows)')
+        if not rows:
+            self.stdout.write('  no rows, skipped')
+            return
+        slow_payload, slow_time = self._time('drf', rows, slow, repeat)
+        fast_payload, fast_time = self._time('fast', rows, fast, repeat)
+        if slow_payload != fast_payload:
+            raise CommandError(f'{name}: fast serialization output differs from the DRF serializers')
+        self.stdout.write(self.style.SUCCESS(f'  identical output, {slow_time / fast_time:.1f}x faster'))
+
+    def handle(self, *args, **options):
+        request = RequestFactory().get('/api/', HTTP_HOST='localhost')
+        repeat = options['repeat']
+        with transaction.atomic():
+            self._seed(options['products'], options['orders'])
+
+            products = Product.objects.filter(is_active=True, is_deleted=False).order_by('-created_at', '-id')
+            self._compare(
+                'products', products.count(),
+                lambda: ProductListSerializer(list(products), many=True, context={'request': request}).data,
+                lambda: serialize_products(list(product_values(products)), request),
+                repeat,
+            )
+
+            top = Order.objects.values('user').annotate(total=Count('id')).order_by('-total').first()
+            user = User.objects.get(pk=top['user']) if top else None
+            hot, cold = order_history(user)
+            hot, cold = hot.order_by('-created_at', '-id'), cold.order_by('-created_at', '-id')
+            rows = hot.count() + cold.count() if user else 0
+
+            # Orders are serialized in API-sized pages, like the endpoint does.
+            def drf_orders(serializer_class, prefetch):
+                data = []
+                for queryset in (hot, cold):
+                    ids = list(queryset.values_list('id', flat=True))
+                    for start in range(0, len(ids), MAX_PAGE_SIZE):
+                        page = queryset.filter(pk__in=ids[start:start + MAX_PAGE_SIZE]).prefetch_related(*prefetch)
+                        data.extend(serializer_class(page, many=True, context={'request': request}).data)
+                return data
+
+            def fast_orders(serialize):
+                data = []
+                for queryset, archived in ((hot, False), (cold, True)):
+                    rows = list(order_values(queryset, archived=archived))
+                    for start in range(0, len(rows), MAX_PAGE_SIZE):
+                        data.extend(serialize(rows[start:start + MAX_PAGE_SIZE], request))
+                return data
+
+            self._compare(
+                'orders', rows,
+                lambda: drf_orders(OrderListSerializer, ['order_items', 'order_items__product']),
+                lambda: fast_orders(serialize_orders),
+                repeat,
+            )
+            self._compare(
+                'order summaries', rows,
+                lambda: drf_orders(OrderSummarySerializer, []),
+                lambda: fast_orders(serialize_order_summaries),
+                repeat,
+            )
+            transaction.set_rollback(True)
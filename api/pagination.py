@@ -0,0 +1,46 @@
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+from shop.pagination import DEFAULT_PAGE_SIZE, InvalidCursor, KeysetPaginator, MergedKeysetPaginator, get_page_size
+
+
+class KeysetPagination(BasePagination):
+    cursor_query_param = 'cursor'
+    page_size_query_param = 'page_size'
+
+    def __init__(self, ordering=('-created_at', '-id'), page_size=DEFAULT_PAGE_SIZE):
+        self.ordering = ordering
+        self.page_size = page_size
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        page_size = get_page_size(request.query_params.get(self.page_size_query_param), default=self.page_size)
+        try:
+            paginator_class = MergedKeysetPaginator if isinstance(queryset, (list, tuple)) else KeysetPaginator
+            self.page = paginator_class(queryset, self.ordering, page_size).page(
+                request.query_params.get(self.cursor_query_param)
+            )
+        except InvalidCursor:
+            raise NotFound('Invalid cursor')
+        return list(self.page)
+
+    def _link(self, cursor):
+        if cursor is None:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, cursor)
+
+    def get_next_link(self):
+        return self._link(self.page.next_cursor)
+
+    def get_previous_link(self):
+        return self._link(self.page.previous_cursor)
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'results': data,
+        })
@@ -0,0 +1,18 @@
+from rest_framework.renderers import JSONRenderer
+
+
+def columnar(records):
+    columns = list(records[0]) if records else []
+    return {'columns': columns, 'rows': [[record.get(column) for column in columns] for record in records]}
+
+
+class ColumnarJSONRenderer(JSONRenderer):
+    # List pages render their results as {"columns": [...], "rows": [[...], ...]}
+    # so each key is sent once per response instead of once per record.
+    media_type = 'application/vnd.shoppe.columnar+json'
+    format = 'columnar'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if isinstance(data, dict) and isinstance(data.get('results'), list):
+            data = {**data, 'results': columnar(data['results'])}
+        return super().render(data, accepted_media_type, renderer_context)
@@ -3,18 +3,29 @@ from rest_framework import serializers
 from shop.models import Product
 from orders.models import Order, OrderItem
 
+ADDRESS_FIELDS = ['id', 'address_line_1', 'address_line_2', 'city', 'state', 'zip_code']
 
 
-class ProductListSerializer(serializers.ModelSerializer):
+
+class SparseFieldsMixin:
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        fields = self.context.get('fields')
+        if fields is not None:
+            for name in set(self.fields) - set(fields):
+                self.fields.pop(name)
+
+
+class ProductListSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     avg_rating = serializers.SerializerMethodField()
     image = serializers.SerializerMethodField()
 
     def get_avg_rating(self, obj):
-        return obj.avg_rating or 0
+        return obj.rating_avg or 0
 
     def get_image(self, obj):
         request = self.context.get('request')
-        return request.build_absolute_uri(obj.image.url) if obj.image else None
+        return request.build_absolute_uri(obj.image_urls['medium']['jpeg']) if obj.image else None
 
     class Meta:
         model = Product
@@ -30,7 +41,7 @@ class OrderItemListSerializer(serializers.ModelSerializer):
             'id': obj.product.id,
             'name': obj.product.name,
             'price': obj.product.price,
-            'image': self.context.get('request').build_absolute_uri(obj.product.image.url) if obj.product.image else None
+            'image': self.context.get('request').build_absolute_uri(obj.product.image_urls['thumb']['jpeg']) if obj.product.image else None
         }
 
     def get_subtotal(self, obj):
@@ -47,14 +58,10 @@ class OrderListSerializer(serializers.ModelSerializer):
     status = serializers.SerializerMethodField()
     
     def get_address(self, obj):
-        return {
-            'id': obj.address.id,
-            'address_line_1': obj.address.address_line_1,
-            'address_line_2': obj.address.address_line_2,
-            'city': obj.address.city,
-            'state': obj.address.state,
-            'zip_code': obj.address.zip_code,
-        }
+        address = obj.delivery_address
+        if isinstance(address, dict):
+            return {field: address.get(field) for field in ADDRESS_FIELDS}
+        return {field: getattr(address, field) for field in ADDRESS_FIELDS}
 
     def get_status(self, obj):
         return obj.get_status_display()
@@ -64,3 +71,18 @@ class OrderListSerializer(serializers.ModelSerializer):
         fields = ['id', 'address', 'status', 'total_amount', 'created_at', 'order_items']
 
 
+class OrderSummarySerializer(OrderListSerializer):
+    first_item = serializers.SerializerMethodField()
+
+    def get_first_item(self, obj):
+        if not obj.first_item_name:
+            return None
+        image = obj.first_item_image_url
+        return {
+            'name': obj.first_item_name,
+            'image': self.context.get('request').build_absolute_uri(image) if image else None,
+        }
+
+    class Meta:
+        model = Order
+        fields = ['id', 'address', 'status', 'total_amount', 'created_at', 'item_count', 'first_item']
@@ -0,0 +1,19 @@
+from datetime import timedelta
+
+from django.utils import timezone
+
+from shop.pagination import KeysetPaginator, encode_cursor
+
+SYNC_ORDERING = ('updated_at', 'id')
+# Rows younger than this are held back for the next sync so a transaction
+# that commits late with an older updated_at cannot slip behind the cursor.
+SYNC_SETTLE_TIME = timedelta(seconds=5)
+
+
+def sync_page(queryset, cursor, page_size):
+    queryset = queryset.filter(updated_at__lte=timezone.now() - SYNC_SETTLE_TIME)
+    paginator = KeysetPaginator(queryset, SYNC_ORDERING, page_size)
+    page = paginator.page(cursor)
+    rows = list(page)
+    next_cursor = encode_cursor([rows[-1][field] for field in paginator.fields]) if rows else cursor
+    return rows, next_cursor, page.has_next
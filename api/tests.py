@@ -0,0 +1,310 @@
+import csv
+import gzip
+import io
+import json
+from datetime import timedelta
+from decimal import Decimal
+
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from api.authentication import UserCache, user_cache, user_tag
+from orders.archive import archive_orders
+from orders.models import Order, OrderItem, OrderStatus
+from shop.cache import invalidate_tags
+from shop.models import Product, ProductRating
+from shop.search import rebuild_index
+from users.models import Address, User
+
+
+class ProductsListSearchTests(TestCase):
+    def setUp(self):
+        Product.objects.create(name='Blue kettle', description='Steel kettle', price=Decimal('20.00'), stock=5)
+
+    def test_search_without_matches_returns_empty_page(self):
+        for q in ('zzzz', '"'):
+            response = self.client.get(reverse('api:products_list'), {'q': q})
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response.json()['results'], [])
+
+
+class ProductsListConditionalTests(TestCase):
+    def test_hard_delete_changes_catalog_etag(self):
+        older = Product.objects.create(name='Old kettle', description='d', price=Decimal('20.00'), stock=5)
+        Product.objects.create(name='New kettle', description='d', price=Decimal('30.00'), stock=5)
+        url = reverse('api:products_list')
+        etag = self.client.get(url)['ETag']
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        older.delete()
+
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()['results']), 1)
+        self.assertFalse(response.has_header('Last-Modified'))
+
+
+class ProductsFieldsetTests(TestCase):
+    def setUp(self):
+        self.kettle = Product.objects.create(name='Blue kettle', description='d', price=Decimal('20.00'), stock=5)
+        self.url = reverse('api:products_list')
+
+    def test_fields_and_exclude_select_keys_in_both_serializers(self):
+        for fast in (True, False):
+            with self.subTest(fast=fast), override_settings(API_FAST_SERIALIZATION=fast):
+                results = self.client.get(self.url, {'fields': 'id, price'}).json()['results']
+                self.assertEqual(results, [{'id': self.kettle.id, 'price': '20.00'}])
+                results = self.client.get(self.url, {'exclude': 'description,image'}).json()['results']
+                self.assertEqual(set(results[0]), {'id', 'name', 'price', 'stock', 'avg_rating'})
+                results = self.client.get(self.url, {'fields': 'id,name', 'exclude': 'name'}).json()['results']
+                self.assertEqual(results, [{'id': self.kettle.id}])
+
+    def test_unknown_or_empty_fieldset_is_rejected(self):
+        for params in ({'fields': 'id,secret'}, {'exclude': 'cost'}, {'fields': 'id', 'exclude': 'id'}):
+            with self.subTest(params=params):
+                response = self.client.get(self.url, params)
+                self.assertEqual(response.status_code, 400)
+                self.assertIn('detail', response.json())
+
+    def test_columnar_renderer_sends_keys_once(self):
+        Product.objects.create(name='Red kettle', description='d', price=Decimal('30.00'), stock=2)
+        response = self.client.get(
+            self.url, {'fields': 'name,price'}, HTTP_ACCEPT='application/vnd.shoppe.columnar+json',
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response['Content-Type'].startswith('application/vnd.shoppe.columnar+json'))
+        self.assertIn('Accept', response['Vary'])
+        results = json.loads(response.content)['results']
+        self.assertEqual(results, {'columns': ['name', 'price'], 'rows': [['Red kettle', '30.00'], ['Blue kettle', '20.00']]})
+
+        plain = self.client.get(self.url, {'fields': 'name,price'}).json()['results']
+        self.assertEqual([dict(zip(results['columns'], row)) for row in results['rows']], plain)
+
+
+class ProductsSearchPaginationTests(TestCase):
+    def test_search_pages_through_every_match(self):
+        Product.objects.bulk_create([
+            Product(name=f'Kettle {i}', description='kettle' if i % 2 else 'steel kettle', price=Decimal(i + 1), stock=1)
+            for i in range(520)
+        ])
+        rebuild_index()
+        seen, url = [], reverse('api:products_list') + '?q=kettle&page_size=100'
+        while url:
+            data = self.client.get(url).json()
+            seen += [product['id'] for product in data['results']]
+            url = data['next']
+        self.assertEqual(len(seen), 520)
+        self.assertEqual(len(set(seen)), 520)
+
+
+class FastSerializationParityTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='buyer@example.com', email='buyer@example.com', password='pw')
+        address = Address.objects.create(
+            user=self.user, address_line_1='1 Main St', city='City', state='State', zip_code='12345', country='IN'
+        )
+        products = [
+            Product.objects.create(name=f'Lamp {i}', description='d', price=Decimal('10.50') + i, stock=3, image=image)
+            for i, image in enumerate(['products/lamp.jpg', '', 'products/desk.png'])
+        ]
+        ProductRating.objects.create(product=products[0], user=self.user, rating=4)
+        for status in (OrderStatus.DELIVERED, OrderStatus.PENDING):
+            order = Order.objects.create(
+                user=self.user, address=address, status=status, total_amount=Decimal('21.00'), item_count=2,
+                first_item_name=products[0].name, shipping_address={'city': 'City'},
+            )
+            OrderItem.objects.bulk_create([
+                OrderItem(order=order, product=product, quantity=1, price=product.price) for product in products[:2]
+            ])
+        Order.objects.filter(status=OrderStatus.DELIVERED).update(created_at=timezone.now() - timedelta(days=400))
+        archive_orders(older_than_days=180)
+        self.client.force_login(self.user)
+
+    def assert_same_payload(self, url, params=None):
+        payloads = []
+        for fast in (True, False):
+            with override_settings(API_FAST_SERIALIZATION=fast):
+                response = self.client.get(url, params or {})
+            self.assertEqual(response.status_code, 200)
+            payloads.append(response.json())
+        self.assertEqual(payloads[0], payloads[1])
+        return payloads[0]
+
+    def test_product_list_matches_drf_serializer(self):
+        self.assertEqual(len(self.assert_same_payload(reverse('api:products_list'))['results']), 3)
+        self.assert_same_payload(reverse('api:products_list'), {'fields': 'id,price,avg_rating'})
+
+    def test_order_lists_match_drf_serializers(self):
+        self.assertEqual(len(self.assert_same_payload(reverse('api:orders_list'))['results']), 2)
+        self.assert_same_payload(reverse('api:orders_list'), {'view': 'summary'})
+
+    def test_benchmark_command_checks_parity(self):
+        call_command('benchmark_api_serializers', products=5, orders=3, repeat=1, stdout=io.StringIO())
+
+
+class ProductExportTests(TestCase):
+    def setUp(self):
+        self.lamp = Product.objects.create(name='Lamp', description='Desk "lamp"', price=Decimal('10.50'), stock=3)
+        self.kettle = Product.objects.create(name='Kettle', description='d', price=Decimal('20.00'), stock=1)
+        self.hidden = Product.objects.create(name='Hidden', description='d', price=Decimal('5.00'), stock=1, is_active=False)
+
+    def export(self, export_format, **extra):
+        response = self.client.get(reverse('api:products_export', args=[export_format]), **extra)
+        self.assertTrue(response.streaming)
+        return response, b''.join(response.streaming_content)
+
+    def test_full_jsonl_export_lists_the_sellable_catalogue(self):
+        response, body = self.export('jsonl')
+        rows = [json.loads(line) for line in body.decode().splitlines()]
+        self.assertEqual([row['id'] for row in rows], [self.lamp.pk, self.kettle.pk])
+        self.assertEqual((rows[0]['price'], rows[0]['available']), ('10.50', True))
+        self.assertIn('products.jsonl', response['Content-Disposition'])
+
+    def test_updated_since_includes_removed_products(self):
+        since = timezone.now()
+        Product.objects.filter(pk=self.lamp.pk).update(updated_at=since - timedelta(days=1))
+        Product.objects.filter(pk=self.kettle.pk).update(updated_at=since - timedelta(days=1))
+        Product.objects.filter(pk=self.hidden.pk).update(updated_at=since + timedelta(seconds=1))
+        Product.objects.filter(pk=self.kettle.pk).update(updated_at=since + timedelta(seconds=2))
+
+        _, body = self.export('jsonl', data={'updated_since': since.isoformat()})
+
+        rows = [json.loads(line) for line in body.decode().splitlines()]
+        self.assertEqual([(row['id'], row['available']) for row in rows], [(self.hidden.pk, False), (self.kettle.pk, True)])
+        response = self.client.get(reverse('api:products_export', args=['jsonl']), {'updated_since': 'yesterday'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_gzip_csv_export(self):
+        response, body = self.export('csv', HTTP_ACCEPT_ENCODING='gzip, deflate')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertIn('Accept-Encoding', response['Vary'])
+        _, plain = self.export('csv')
+        self.assertEqual(gzip.decompress(body), plain)
+        rows = list(csv.DictReader(io.StringIO(plain.decode())))
+        self.assertEqual([row['name'] for row in rows], ['Lamp', 'Kettle'])
+        self.assertEqual(rows[0]['description'], 'Desk "lamp"')
+
+
+class DeltaSyncTests(TestCase):
+    def setUp(self):
+        self.settled = timezone.now() - timedelta(minutes=10)
+        self.products = [
+            Product.objects.create(name=f'Lamp {i}', description='d', price=Decimal('10.00'), stock=1) for i in range(5)
+        ]
+        # Equal updated_at values must be split across pages by id alone.
+        Product.objects.update(updated_at=self.settled)
+
+    def sync(self, cursor=None, page_size=2):
+        params = {'page_size': page_size}
+        if cursor:
+            params['cursor'] = cursor
+        return self.client.get(reverse('api:products_sync'), params).json()
+
+    def full_sync(self):
+        seen, cursor = [], None
+        while True:
+            data = self.sync(cursor)
+            seen.extend(row['id'] for row in data['results'])
+            cursor = data['cursor']
+            if not data['has_more']:
+                return seen, cursor
+
+    def test_pages_through_equal_timestamps_without_gaps(self):
+        seen, cursor = self.full_sync()
+        self.assertEqual(seen, [product.pk for product in self.products])
+        data = self.sync(cursor)
+        self.assertEqual((data['results'], data['removed'], data['cursor']), ([], [], cursor))
+
+    def test_returns_changes_and_removals_after_the_cursor(self):
+        _, cursor = self.full_sync()
+        changed, removed, fresh = self.products[1], self.products[2], self.products[3]
+        Product.objects.filter(pk=changed.pk).update(name='Renamed', updated_at=self.settled + timedelta(minutes=1))
+        Product.objects.filter(pk=removed.pk).update(is_deleted=True, updated_at=self.settled + timedelta(minutes=1))
+        # Too recent to be safe from late commits; held for the next sync.
+        Product.objects.filter(pk=fresh.pk).update(name='Fresh', updated_at=timezone.now())
+
+        data = self.sync(cursor, page_size=10)
+
+        self.assertEqual([(row['id'], row['name']) for row in data['results']], [(changed.pk, 'Renamed')])
+        self.assertEqual([row['id'] for row in data['removed']], [removed.pk])
+        self.assertFalse(data['has_more'])
+
+    def test_rejects_bad_cursor_and_scopes_orders_to_the_user(self):
+        response = self.client.get(reverse('api:products_sync'), {'cursor': 'garbage'})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn(self.client.get(reverse('api:orders_sync')).status_code, (401, 403))
+
+        user = User.objects.create_user(username='buyer@example.com', email='buyer@example.com', password='pw')
+        other = User.objects.create_user(username='other@example.com', email='other@example.com', password='pw')
+        for owner in (user, other):
+            address = Address.objects.create(
+                user=owner, address_line_1='1 Main St', city='City', state='State', zip_code='12345', country='IN'
+            )
+            Order.objects.create(user=owner, address=address, total_amount=Decimal('10.00'))
+        Order.objects.update(updated_at=self.settled)
+        self.client.force_login(user)
+
+        data = self.client.get(reverse('api:orders_sync')).json()
+
+        self.assertEqual([row['id'] for row in data['results']], list(Order.objects.filter(user=user).values_list('id', flat=True)))
+
+
+class BatchTests(TestCase):
+    def _batch(self, requests):
+        return self.client.post(reverse('api:batch'), json.dumps({'requests': requests}), content_type='application/json')
+
+    def test_batched_idempotent_write_is_replayed(self):
+        registration = {
+            'method': 'POST',
+            'path': reverse('api:user_registration'),
+            'headers': {'Idempotency-Key': 'batch-register-1'},
+            'body': {
+                'name': 'Batch User', 'email': 'batch@example.com',
+                'password1': 'S3cure-pass-123', 'password2': 'S3cure-pass-123',
+            },
+        }
+        first = self._batch([registration]).json()['responses'][0]
+        second = self._batch([registration]).json()['responses'][0]
+        self.assertEqual(first['status'], 201)
+        self.assertEqual(second['status'], 201)
+        self.assertEqual(second['headers'].get('Idempotent-Replayed'), 'true')
+        self.assertEqual(User.objects.filter(email='batch@example.com').count(), 1)
+
+
+class CachedJWTAuthenticationTests(TestCase):
+    def setUp(self):
+        user_cache.clear()
+        self.user = User.objects.create_user(username='jwt@example.com', email='jwt@example.com', password='pw')
+        token = RefreshToken.for_user(self.user).access_token
+        self.auth = {'HTTP_AUTHORIZATION': f'Bearer {token}'}
+
+    def test_cached_user_skips_lookup_and_honours_deactivation(self):
+        url = reverse('api:orders_list')
+        self.assertEqual(self.client.get(url, **self.auth).status_code, 200)
+        with self.assertNumQueries(2):
+            self.assertEqual(self.client.get(url, **self.auth).status_code, 200)
+        self.user.is_active = False
+        self.user.save()
+        self.assertEqual(self.client.get(url, **self.auth).status_code, 401)
+
+    def test_change_in_one_worker_retires_entries_in_another(self):
+        worker_a, worker_b = UserCache(), UserCache()
+        for worker in (worker_a, worker_b):
+            cached, version = worker.get(self.user.pk)
+            self.assertIsNone(cached)
+            worker.set(self.user.pk, version, self.user)
+        self.assertEqual(worker_b.get(self.user.pk)[0].pk, self.user.pk)
+
+        worker_a.invalidate(self.user.pk)
+        self.assertIsNone(worker_b.get(self.user.pk)[0])
+
+    def test_deactivation_by_another_process_rejects_fresh_local_entry(self):
+        url = reverse('api:orders_list')
+        self.assertEqual(self.client.get(url, **self.auth).status_code, 200)
+        # Another worker: the row changes without this process's signal, only the shared version moves.
+        User.objects.filter(pk=self.user.pk).update(is_active=False)
+        invalidate_tags(user_tag(self.user.pk))
+        self.assertEqual(self.client.get(url, **self.auth).status_code, 401)
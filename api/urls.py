@@ -1,7 +1,7 @@
-from django.urls import path
+from django.urls import path, re_path
 
 from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
-from api.views import user_registration, products_list, orders_list
+from api.views import batch, user_registration, products_list, products_export, products_sync, orders_list, orders_sync
 
 app_name = 'api'
 
@@ -10,5 +10,9 @@ urlpatterns = [
     path('users/login/', TokenObtainPairView.as_view(), name='token_obtain_pair'),
     path('users/token/refresh/', TokenRefreshView.as_view(), name='token_refresh'),
     path('products/', products_list, name='products_list'),
+    re_path(r'^products/export\.(?P<export_format>jsonl|csv)$', products_export, name='products_export'),
+    path('products/sync/', products_sync, name='products_sync'),
     path('orders/', orders_list, name='orders_list'),
+    path('orders/sync/', orders_sync, name='orders_sync'),
+    path('batch/', batch, name='batch'),
 ]
\ No newline at end of file
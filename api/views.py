@@ -1,6 +1,10 @@
 import logging
 
-from django.db.models import Avg
+from django.conf import settings
+from django.http import StreamingHttpResponse
+from django.utils.cache import patch_vary_headers
+from django.utils.text import compress_sequence
+from django.views.decorators.http import condition
 
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import AllowAny, IsAuthenticated
@@ -9,12 +13,27 @@ from rest_framework import status
 
 from users.forms import UserRegistrationForm
 from shop.models import Product
-from api.serializers import ProductListSerializer, OrderListSerializer
+from shop.pagination import InvalidCursor, get_page_size
+from shop.search import search_products
+from shop.conditional import catalog_etag
+from api.serializers import ProductListSerializer, OrderListSerializer, OrderSummarySerializer
+from api.pagination import KeysetPagination
+from api.batch import BatchError, parse_operations, run_batch
+from api.export import csv_stream, export_rows, jsonl_stream, parse_updated_since
+from api.sync import SYNC_ORDERING, sync_page
+from api.fast_serializers import (
+    PRODUCT_FIELDS, datetime_string, order_values, product_columns, product_values, serialize_order_summaries,
+    serialize_orders, serialize_products,
+)
+from api.fieldsets import FieldsetError, parse_fieldset
+from orders.archive import order_history
 from orders.models import Order
+from orders.idempotency import idempotent
 
 logger = logging.getLogger('api')
 
 
+@idempotent
 @api_view(['POST'])
 @permission_classes([AllowAny])
 def user_registration(request):
@@ -30,19 +49,115 @@ def user_registration(request):
     return Response(form.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
+@condition(etag_func=catalog_etag)
 @api_view(['GET'])
 @permission_classes([AllowAny])
 def products_list(request):
-    products = Product.objects.filter(is_active=True, is_deleted=False).annotate(avg_rating=Avg('ratings__rating'))
-    logger.info(f"API products list requested: count={products.count()}, from={request.META.get('REMOTE_ADDR', 'unknown')}")
-    serializer = ProductListSerializer(products, many=True, context={'request': request})
-    return Response(serializer.data)
+    try:
+        fields = parse_fieldset(request.query_params, PRODUCT_FIELDS)
+    except FieldsetError as e:
+        return Response({'detail': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+    products = Product.objects.filter(is_active=True, is_deleted=False)
+    q = request.query_params.get('q')
+    if q:
+        products = search_products(products, q)
+    ordering = ('search_rank', 'id') if q else ('-created_at', '-id')
+    paginator = KeysetPagination(ordering=ordering)
+    if settings.API_FAST_SERIALIZATION:
+        page = paginator.paginate_queryset(product_values(products, ordering, fields=fields), request)
+        data = serialize_products(page, request, fields)
+    else:
+        sort_columns = [name.lstrip('-') for name in ordering if name != 'search_rank']
+        page = paginator.paginate_queryset(products.only(*product_columns(fields), *sort_columns), request)
+        data = ProductListSerializer(page, many=True, context={'request': request, 'fields': fields}).data
+    logger.info(f"API products list requested: q={q!r}, fields={','.join(fields)}, page_count={len(page)}, from={request.META.get('REMOTE_ADDR', 'unknown')}")
+    response = paginator.get_paginated_response(data)
+    patch_vary_headers(response, ['Accept'])
+    return response
 
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def orders_list(request):
-    orders = Order.objects.filter(user=request.user).prefetch_related('order_items', 'order_items__product')
-    logger.info(f"API orders list requested: user={request.user.email}, count={orders.count()}")
-    serializer = OrderListSerializer(orders, many=True, context={'request': request})
-    return Response(serializer.data)
\ No newline at end of file
+    summary = request.query_params.get('view') == 'summary'
+    hot, cold = order_history(request.user)
+    paginator = KeysetPagination(ordering=('-created_at', '-id'))
+    if settings.API_FAST_SERIALIZATION:
+        page = paginator.paginate_queryset([order_values(hot), order_values(cold, archived=True)], request)
+        data = serialize_order_summaries(page, request) if summary else serialize_orders(page, request)
+    else:
+        if not summary:
+            hot, cold = (queryset.prefetch_related('order_items', 'order_items__product') for queryset in (hot, cold))
+        page = paginator.paginate_queryset([hot, cold], request)
+        serializer_class = OrderSummarySerializer if summary else OrderListSerializer
+        data = serializer_class(page, many=True, context={'request': request}).data
+    logger.info(f"API orders list requested: user={request.user.email}, summary={summary}, page_count={len(page)}")
+    return paginator.get_paginated_response(data)
+
+
+@api_view(['GET'])
+@permission_classes([AllowAny])
+def products_export(request, export_format):
+    try:
+        updated_since = parse_updated_since(request.query_params.get('updated_since'))
+    except ValueError as e:
+        return Response({'detail': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+    rows = export_rows(request, updated_since=updated_since)
+    if export_format == 'csv':
+        stream, content_type = csv_stream(rows), 'text/csv; charset=utf-8'
+    else:
+        stream, content_type = jsonl_stream(rows), 'application/x-ndjson; charset=utf-8'
+    gzip = 'gzip' in request.headers.get('Accept-Encoding', '')
+    if gzip:
+        stream = compress_sequence(chunk.encode() for chunk in stream)
+    response = StreamingHttpResponse(stream, content_type=content_type)
+    response['Content-Disposition'] = f'attachment; filename="products.{export_format}"'
+    patch_vary_headers(response, ['Accept-Encoding'])
+    if gzip:
+        response['Content-Encoding'] = 'gzip'
+    logger.info(f"API products export started: format={export_format}, updated_since={updated_since}, gzip={gzip}, from={request.META.get('REMOTE_ADDR', 'unknown')}")
+    return response
+
+
+def _sync_response(request, queryset, serialize, kind):
+    cursor = request.query_params.get('cursor')
+    try:
+        rows, next_cursor, has_more = sync_page(
+            queryset, cursor, get_page_size(request.query_params.get('page_size'))
+        )
+    except InvalidCursor:
+        return Response({'detail': 'Invalid cursor'}, status=status.HTTP_400_BAD_REQUEST)
+    gone = [row for row in rows if row.get('is_deleted') or not row.get('is_active', True)]
+    live = [row for row in rows if row not in gone]
+    results = serialize(live, request)
+    for record, row in zip(results, live):
+        record['updated_at'] = datetime_string(row['updated_at'])
+    removed = [{'id': row['id'], 'updated_at': datetime_string(row['updated_at'])} for row in gone]
+    logger.info(f"API {kind} sync requested: changed={len(results)}, removed={len(removed)}, has_more={has_more}, from={request.META.get('REMOTE_ADDR', 'unknown')}")
+    return Response({'results': results, 'removed': removed, 'cursor': next_cursor, 'has_more': has_more})
+
+
+@api_view(['GET'])
+@permission_classes([AllowAny])
+def products_sync(request):
+    products = product_values(Product.objects.all(), SYNC_ORDERING, extra=('is_active', 'is_deleted'))
+    return _sync_response(request, products, serialize_products, 'products')
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def orders_sync(request):
+    orders = order_values(Order.objects.filter(user=request.user), ordering=SYNC_ORDERING)
+    return _sync_response(request, orders, serialize_orders, 'orders')
+
+
+@api_view(['POST'])
+@permission_classes([AllowAny])
+def batch(request):
+    try:
+        operations = parse_operations(request.data)
+    except BatchError as e:
+        return Response({'detail': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+    responses = run_batch(request, operations)
+    logger.info(f"API batch processed: requests={len(operations)}, user={getattr(request.user, 'email', None)}, from={request.META.get('REMOTE_ADDR', 'unknown')}")
+    return Response({'responses': responses})
@@ -23,6 +23,7 @@ INSTALLED_APPS = [
     'users',
     'shop',
     'orders',
+    'api',
 ]
 
 MIDDLEWARE = [
@@ -62,8 +63,20 @@ DATABASES = {
     }
 }
 
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'shoppe',
+    }
+}
+
 AUTH_USER_MODEL = 'users.User'
 
+EMAIL_BACKEND = 'django.core.mail.backends.console.EmailBackend'
+DEFAULT_FROM_EMAIL = 'Shoppe <no-reply@shoppe.kynfo.com>'
+
+ORDER_ARCHIVE_AFTER_DAYS = 180
+
 
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -107,11 +120,18 @@ LOGIN_REDIRECT_URL = 'shop:index'
 LOGOUT_REDIRECT_URL = 'shop:index'
 
 
+API_FAST_SERIALIZATION = True
+
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'api.authentication.CachedJWTAuthentication',
         'rest_framework.authentication.SessionAuthentication',
     ],
+    'DEFAULT_RENDERER_CLASSES': [
+        'rest_framework.renderers.JSONRenderer',
+        'api.renderers.ColumnarJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
     ],
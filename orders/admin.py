@@ -1,6 +1,6 @@
 from django.contrib import admin
 
-from orders.models import Order, OrderItem
+from orders.models import Job, Order, OrderItem, StockReservation
 
 
 @admin.register(Order)
@@ -13,4 +13,18 @@ class OrderAdmin(admin.ModelAdmin):
 class OrderItemAdmin(admin.ModelAdmin):
     list_display = ['order', 'product', 'quantity', 'price', 'created_at']
     list_filter = ['created_at']
-    search_fields = ['order__user__username', 'product__name']
\ No newline at end of file
+    search_fields = ['order__user__username', 'product__name']
+
+
+@admin.register(StockReservation)
+class StockReservationAdmin(admin.ModelAdmin):
+    list_display = ['product', 'user', 'quantity', 'expires_at', 'created_at']
+    list_filter = ['expires_at']
+    search_fields = ['user__username', 'product__name']
+
+
+@admin.register(Job)
+class JobAdmin(admin.ModelAdmin):
+    list_display = ['id', 'name', 'status', 'attempts', 'run_at', 'created_at']
+    list_filter = ['status', 'name']
+    readonly_fields = ['claimed_by', 'claimed_at', 'last_error', 'created_at', 'updated_at']
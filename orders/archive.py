@@ -0,0 +1,91 @@
+import logging
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from orders.models import (
+    ArchivedOrder, ArchivedOrderItem, Order, OrderItem, OrderStatus,
+)
+
+logger = logging.getLogger('orders')
+
+ARCHIVABLE_STATUSES = (OrderStatus.DELIVERED, OrderStatus.CANCELLED)
+ARCHIVE_BATCH_SIZE = 500
+
+
+def period_of(value):
+    return value.year * 100 + value.month
+
+
+def _archive_batch(cutoff, batch_size):
+    with transaction.atomic():
+        orders = list(Order.objects.select_for_update().filter(
+            status__in=ARCHIVABLE_STATUSES, created_at__lt=cutoff
+        ).order_by('id')[:batch_size])
+        if not orders:
+            return 0
+        ids = [order.id for order in orders]
+        items = list(OrderItem.objects.filter(order_id__in=ids).order_by('id'))
+
+        ArchivedOrder.objects.bulk_create([
+            ArchivedOrder(
+                id=order.id,
+                user_id=order.user_id,
+                status=order.status,
+                total_amount=order.total_amount,
+                item_count=order.item_count,
+                first_item_name=order.first_item_name,
+                first_item_image=order.first_item_image,
+                shipping_address=order.shipping_address,
+                period=period_of(order.created_at),
+                created_at=order.created_at,
+                updated_at=order.updated_at,
+            )
+            for order in orders
+        ])
+        ArchivedOrderItem.objects.bulk_create([
+            ArchivedOrderItem(
+                id=item.id,
+                order_id=item.order_id,
+                product_id=item.product_id,
+                quantity=item.quantity,
+                price=item.price,
+                created_at=item.created_at,
+            )
+            for item in items
+        ])
+
+        OrderItem.objects.filter(order_id__in=ids).delete()
+        Order.objects.filter(id__in=ids).delete()
+    return len(orders)
+
+
+def archive_orders(older_than_days=None, batch_size=ARCHIVE_BATCH_SIZE):
+    if older_than_days is None:
+        older_than_days = settings.ORDER_ARCHIVE_AFTER_DAYS
+    cutoff = timezone.now() - timedelta(days=older_than_days)
+    archived = 0
+    while True:
+        moved = _archive_batch(cutoff, batch_size)
+        if not moved:
+            break
+        archived += moved
+        logger.info(f"Orders archived: batch={moved}, total={archived}")
+    return archived
+
+
+def order_history(user=None):
+    hot, cold = Order.objects.all(), ArchivedOrder.objects.all()
+    if user is not None:
+        hot, cold = hot.filter(user=user), cold.filter(user=user)
+    return hot, cold
+
+
+def find_order(order_id, user=None):
+    for queryset in order_history(user):
+        order = queryset.filter(pk=order_id).first()
+        if order is not None:
+            return order
+    return None
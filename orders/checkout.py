@@ -0,0 +1,86 @@
+import logging
+from collections import Counter
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from orders.models import Order, OrderItem, StockReservation
+from orders.reservations import availability_message, quantity_case, release
+from shop.cache import CATALOG_TAG, invalidate_tags, product_tag
+from shop.models import Product
+from users.models import CartItem
+
+logger = logging.getLogger('orders')
+
+
+class CheckoutError(Exception):
+    pass
+
+
+def _decrement_stock(quantities):
+    # One conditional UPDATE for the whole cart: a product only matches when it
+    # is still sellable and has enough stock outside other shoppers' holds, so
+    # a short row count means some line could not be fulfilled and the caller
+    # must roll back.
+    decrement = quantity_case(quantities)
+    return Product.objects.filter(
+        pk__in=quantities, is_active=True, is_deleted=False, stock__gte=F('reserved_stock') + decrement
+    ).update(stock=F('stock') - decrement, updated_at=timezone.now())
+
+
+def address_snapshot(address):
+    return {
+        'id': address.id,
+        'address_line_1': address.address_line_1,
+        'address_line_2': address.address_line_2,
+        'city': address.city,
+        'state': address.state,
+        'zip_code': address.zip_code,
+        'country': address.country,
+    }
+
+
+def summary_fields(address, cart_items):
+    first = cart_items[0].product
+    if first.has_image_variants:
+        image = first.image_variants['thumb']['jpeg']
+    else:
+        image = first.image.name if first.image else ''
+    return {
+        'item_count': sum(item.quantity for item in cart_items),
+        'first_item_name': first.name,
+        'first_item_image': image,
+        'shipping_address': address_snapshot(address),
+    }
+
+
+def place_order(user, address, cart_items):
+    if not cart_items:
+        raise CheckoutError('Your cart is empty.')
+    quantities = Counter()
+    for item in cart_items:
+        quantities[item.product_id] += item.quantity
+    total = sum((item.product.price * item.quantity for item in cart_items), Decimal('0'))
+
+    try:
+        with transaction.atomic():
+            release(StockReservation.objects.filter(user=user))
+            if _decrement_stock(quantities) != len(quantities):
+                raise CheckoutError()
+            order = Order.objects.create(
+                user=user, address=address, total_amount=total, **summary_fields(address, cart_items)
+            )
+            OrderItem.objects.bulk_create([
+                OrderItem(order=order, product_id=item.product_id, quantity=item.quantity, price=item.product.price)
+                for item in cart_items
+            ])
+            CartItem.objects.filter(pk__in=[item.pk for item in cart_items]).delete()
+            tags = [product_tag(product_id) for product_id in quantities]
+            transaction.on_commit(lambda: invalidate_tags(*tags, CATALOG_TAG))
+    except CheckoutError:
+        raise CheckoutError(availability_message(quantities)) from None
+
+    logger.info(f"Order placed: order_id={order.id}, items={len(cart_items)}, total_amount={total}, user={user.email}")
+    return order
@@ -0,0 +1,117 @@
+import hashlib
+import logging
+from datetime import timedelta
+from functools import wraps
+
+from django.db import IntegrityError, transaction
+from django.http import HttpResponse, JsonResponse
+from django.utils import timezone
+
+from orders.models import IdempotencyKey
+
+logger = logging.getLogger('orders')
+
+IDEMPOTENCY_TTL = timedelta(hours=24)
+IN_PROGRESS_TIMEOUT = timedelta(minutes=5)
+PURGE_BATCH_SIZE = 1000
+IDEMPOTENCY_HEADER = 'Idempotency-Key'
+IDEMPOTENCY_FIELD = 'idempotency_key'
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS', 'TRACE')
+
+
+def _request_key(request):
+    key = request.headers.get(IDEMPOTENCY_HEADER) or request.POST.get(IDEMPOTENCY_FIELD)
+    return key.strip()[:255] if key else None
+
+
+def _scope(request):
+    # API clients authenticate inside DRF, after this wrapper runs, so their
+    # credentials are folded into the scope instead of the resolved user.
+    if request.user.is_authenticated:
+        return f'user:{request.user.pk}'
+    authorization = request.headers.get('Authorization')
+    if authorization:
+        return f"auth:{hashlib.sha256(authorization.encode()).hexdigest()}"
+    return 'anonymous'
+
+
+def _fingerprint(request):
+    digest = hashlib.sha256()
+    digest.update(request.method.encode())
+    digest.update(request.path.encode())
+    digest.update(request.body)
+    return digest.hexdigest()
+
+
+def _replay(record):
+    response = HttpResponse(bytes(record.body), status=record.status_code, content_type=record.content_type or None)
+    if record.location:
+        response['Location'] = record.location
+    response['Idempotent-Replayed'] = 'true'
+    return response
+
+
+def idempotent(view_func):
+    @wraps(view_func)
+    def wrapper(request, *args, **kwargs):
+        if request.method in SAFE_METHODS:
+            return view_func(request, *args, **kwargs)
+        # The body is fingerprinted before request.POST is touched so
+        # multipart payloads stay readable for the view.
+        request_hash = _fingerprint(request)
+        key = _request_key(request)
+        if not key:
+            return view_func(request, *args, **kwargs)
+
+        scope = _scope(request)
+        try:
+            with transaction.atomic():
+                record = IdempotencyKey.objects.create(
+                    scope=scope, key=key, request_hash=request_hash, expires_at=timezone.now() + IDEMPOTENCY_TTL
+                )
+        except IntegrityError:
+            now = timezone.now()
+            record = IdempotencyKey.objects.filter(scope=scope, key=key).first()
+            abandoned = record is not None and record.status_code is None and record.created_at <= now - IN_PROGRESS_TIMEOUT
+            if record is None or record.expires_at <= now or abandoned:
+                IdempotencyKey.objects.filter(pk=getattr(record, 'pk', None)).delete()
+                return wrapper(request, *args, **kwargs)
+            if record.request_hash != request_hash:
+                logger.warning(f"Idempotency key reused with a different request: key={key}, scope={scope}")
+                return JsonResponse({'detail': 'Idempotency key was already used for a different request.'}, status=422)
+            if record.status_code is None:
+                return JsonResponse({'detail': 'A request with this idempotency key is still in progress.'}, status=409)
+            logger.info(f"Idempotent response replayed: key={key}, scope={scope}, path={request.path}")
+            return _replay(record)
+
+        try:
+            response = view_func(request, *args, **kwargs)
+            if hasattr(response, 'render') and not response.is_rendered:
+                response.render()
+        except Exception:
+            record.delete()
+            raise
+        if response.status_code >= 500 or response.streaming:
+            record.delete()
+            return response
+        record.status_code = response.status_code
+        record.content_type = response.get('Content-Type', '')
+        record.location = response.get('Location', '')
+        record.body = response.content
+        record.save(update_fields=['status_code', 'content_type', 'location', 'body'])
+        return response
+    return wrapper
+
+
+def purge_expired_keys(batch_size=PURGE_BATCH_SIZE):
+    purged = 0
+    while True:
+        ids = list(IdempotencyKey.objects.filter(expires_at__lte=timezone.now()).order_by('expires_at').values_list(
+            'id', flat=True
+        )[:batch_size])
+        if not ids:
+            break
+        purged += IdempotencyKey.objects.filter(pk__in=ids).delete()[0]
+    if purged:
+        logger.info(f"Expired idempotency keys purged: count={purged}")
+    return purged
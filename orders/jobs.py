@@ -0,0 +1,117 @@
+import logging
+import random
+import traceback
+import uuid
+from datetime import timedelta
+
+from django.db import close_old_connections, connection, transaction
+from django.db.models import Count, F, Q
+from django.utils import timezone
+
+from orders.models import Job, JobStatus
+
+logger = logging.getLogger('orders')
+
+CLAIM_BATCH_SIZE = 10
+CLAIM_TIMEOUT = timedelta(minutes=10)
+BACKOFF_BASE_SECONDS = 5
+BACKOFF_MAX_SECONDS = 60 * 60
+
+_handlers = {}
+
+
+def task(name):
+    def register(func):
+        _handlers[name] = func
+        return func
+    return register
+
+
+def enqueue(name, payload=None, delay=None, max_attempts=5):
+    # The job row is written in the caller's transaction, so it only becomes
+    # visible to workers once the data it refers to has been committed.
+    run_at = timezone.now() + delay if delay else timezone.now()
+    job = Job.objects.create(name=name, payload=payload or {}, run_at=run_at, max_attempts=max_attempts)
+    logger.info(f"Job enqueued: job_id={job.id}, name={name}")
+    return job
+
+
+def _ready_jobs(now):
+    return Job.objects.filter(status=JobStatus.QUEUED, run_at__lte=now).order_by('run_at', 'id')
+
+
+def claim(batch_size=CLAIM_BATCH_SIZE):
+    now = timezone.now()
+    token = uuid.uuid4().hex
+    with transaction.atomic():
+        candidates = _ready_jobs(now)
+        if connection.features.has_select_for_update_skip_locked:
+            candidates = candidates.select_for_update(skip_locked=True)
+        ids = list(candidates.values_list('id', flat=True)[:batch_size])
+        if not ids:
+            return []
+        # Without SKIP LOCKED (SQLite) the status guard makes the claim a
+        # compare-and-set: a job taken by another worker in the meantime is
+        # simply not updated, and the token tells us which rows we won.
+        Job.objects.filter(pk__in=ids, status=JobStatus.QUEUED).update(
+            status=JobStatus.RUNNING, claimed_by=token, claimed_at=now, attempts=F('attempts') + 1, updated_at=now
+        )
+    return list(Job.objects.filter(pk__in=ids, claimed_by=token, status=JobStatus.RUNNING).order_by('run_at', 'id'))
+
+
+def backoff(attempts):
+    delay = min(BACKOFF_BASE_SECONDS * 2 ** (attempts - 1), BACKOFF_MAX_SECONDS)
+    return timedelta(seconds=delay * random.uniform(0.8, 1.2))
+
+
+def run_job(job):
+    handler = _handlers.get(job.name)
+    try:
+        if handler is None:
+            raise LookupError(f'No handler registered for job {job.name!r}')
+        handler(**job.payload)
+    except Exception as e:
+        now = timezone.now()
+        error = ''.join(traceback.format_exception(e))[-4000:]
+        if job.attempts >= job.max_attempts:
+            Job.objects.filter(pk=job.pk, claimed_by=job.claimed_by).update(
+                status=JobStatus.FAILED, last_error=error, updated_at=now
+            )
+            logger.error(f"Job failed permanently: job_id={job.id}, name={job.name}, attempts={job.attempts}, error={str(e)}")
+        else:
+            retry_at = now + backoff(job.attempts)
+            Job.objects.filter(pk=job.pk, claimed_by=job.claimed_by).update(
+                status=JobStatus.QUEUED, run_at=retry_at, last_error=error, claimed_by='', claimed_at=None, updated_at=now
+            )
+            logger.warning(f"Job failed, retrying: job_id={job.id}, name={job.name}, attempts={job.attempts}, retry_at={retry_at.isoformat()}, error={str(e)}")
+        return False
+    Job.objects.filter(pk=job.pk, claimed_by=job.claimed_by).delete()
+    logger.info(f"Job completed: job_id={job.id}, name={job.name}, attempts={job.attempts}")
+    return True
+
+
+def run_in_worker(job):
+    try:
+        return run_job(job)
+    finally:
+        close_old_connections()
+
+
+def requeue_stale(timeout=CLAIM_TIMEOUT):
+    now = timezone.now()
+    requeued = Job.objects.filter(status=JobStatus.RUNNING, claimed_at__lte=now - timeout).update(
+        status=JobStatus.QUEUED, claimed_by='', claimed_at=None, run_at=now, updated_at=now
+    )
+    if requeued:
+        logger.warning(f"Stale jobs requeued: count={requeued}")
+    return requeued
+
+
+def queue_depth():
+    now = timezone.now()
+    return Job.objects.aggregate(
+        ready=Count('id', filter=Q(status=JobStatus.QUEUED, run_at__lte=now)),
+        scheduled=Count('id', filter=Q(status=JobStatus.QUEUED, run_at__gt=now)),
+        running=Count('id', filter=Q(status=JobStatus.RUNNING)),
+        failed=Count('id', filter=Q(status=JobStatus.FAILED)),
+    )
@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from orders.recommendations import CHUNK_ORDERS, TOP_N, build_recommendations
+
+
+class Command(BaseCommand):
+    help = 'Build "frequently bought together" recommendations from order history'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--full', action='store_true', help='Recount every order instead of only orders placed since the last build (done automatically once a week)')
+        parser.add_argument('--top', type=int, default=TOP_N, help='Recommendations stored per product')
+        parser.add_argument('--chunk-orders', type=int, default=CHUNK_ORDERS, help='Orders processed per chunk')
+
+    def handle(self, *args, **options):
+        build = build_recommendations(full=options['full'], top_n=options['top'], chunk_orders=options['chunk_orders'])
+        self.stdout.write(self.style.SUCCESS(
+            f'Processed {build.orders_processed} orders up to #{build.last_order_id}; '
+            f'refreshed recommendations for {build.products_updated} products'
+        ))
@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from orders.models import DailySales
+from orders.rollups import rebuild_sales_rollups
+
+
+class Command(BaseCommand):
+    help = 'Recompute daily sales rollups and running totals from orders, archived orders and customers'
+
+    def handle(self, *args, **options):
+        totals = rebuild_sales_rollups()
+        self.stdout.write(self.style.SUCCESS(
+            f'Rebuilt {DailySales.objects.count()} days: {totals.order_count} orders, '
+            f'{totals.revenue} revenue, {totals.customer_count} customers, {totals.product_count} products'
+        ))
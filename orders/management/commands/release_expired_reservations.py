@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+
+from orders.reservations import SWEEP_BATCH_SIZE, recount_reserved_stock, release_expired
+
+
+class Command(BaseCommand):
+    help = 'Release expired checkout stock reservations in batches'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=SWEEP_BATCH_SIZE)
+        parser.add_argument('--recount', action='store_true', help='Also rebuild reserved stock counters from active holds')
+
+    def handle(self, *args, **options):
+        released = release_expired(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'Released {released} expired reservations'))
+        if options['recount']:
+            drifted = recount_reserved_stock()
+            self.stdout.write(self.style.SUCCESS(f'Corrected reserved stock for {drifted} products'))
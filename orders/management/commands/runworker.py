@@ -0,0 +1,50 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand
+
+from orders.jobs import CLAIM_BATCH_SIZE, claim, queue_depth, requeue_stale, run_in_worker
+
+STATS_INTERVAL = 60
+
+
+class Command(BaseCommand):
+    help = 'Run background jobs from the database queue'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--concurrency', type=int, default=4)
+        parser.add_argument('--batch-size', type=int, default=CLAIM_BATCH_SIZE)
+        parser.add_argument('--poll-interval', type=float, default=1.0)
+        parser.add_argument('--once', action='store_true', help='Exit when no jobs are ready instead of polling')
+        parser.add_argument('--stats', action='store_true', help='Print the queue depth and exit')
+
+    def _write_stats(self):
+        depth = queue_depth()
+        self.stdout.write(', '.join(f'{state}={count}' for state, count in depth.items()))
+
+    def handle(self, *args, **options):
+        if options['stats']:
+            self._write_stats()
+            return
+
+        processed, failed = 0, 0
+        last_stats = 0
+        with ThreadPoolExecutor(max_workers=options['concurrency'], thread_name_prefix='jobs') as executor:
+            try:
+                while True:
+                    if time.monotonic() - last_stats >= STATS_INTERVAL:
+                        requeue_stale()
+                        self._write_stats()
+                        last_stats = time.monotonic()
+                    jobs = claim(batch_size=options['batch_size'])
+                    if not jobs:
+                        if options['once']:
+                            break
+                        time.sleep(options['poll_interval'])
+                        continue
+                    for succeeded in executor.map(run_in_worker, jobs):
+                        processed += 1
+                        failed += not succeeded
+            except KeyboardInterrupt:
+                self.stdout.write('Stopping worker')
+        self.stdout.write(self.style.SUCCESS(f'Processed {processed} jobs ({failed} failed attempts)'))
@@ -0,0 +1,74 @@
+# Generated by Django 5.2.8 on 2026-10-17 22:41
+
+from collections import defaultdict
+
+from django.db import migrations, models
+
+ADDRESS_FIELDS = ['id', 'address_line_1', 'address_line_2', 'city', 'state', 'zip_code', 'country']
+SUMMARY_FIELDS = ['item_count', 'first_item_name', 'first_item_image', 'shipping_address']
+BATCH_SIZE = 500
+
+
+def backfill_order_summaries(apps, schema_editor):
+    Order = apps.get_model('orders', 'Order')
+    OrderItem = apps.get_model('orders', 'OrderItem')
+    orders = Order.objects.select_related('address').order_by('id')
+    last_id = 0
+    while True:
+        batch = list(orders.filter(id__gt=last_id)[:BATCH_SIZE])
+        if not batch:
+            break
+        # One items query per batch; grouped in Python instead of a query per order.
+        order_items = defaultdict(list)
+        for item in OrderItem.objects.filter(order_id__in=[order.id for order in batch]).select_related('product').order_by(
+            'order_id', 'id'
+        ):
+            order_items[item.order_id].append(item)
+        for order in batch:
+            _fill_summary(order, order_items[order.id])
+        Order.objects.bulk_update(batch, SUMMARY_FIELDS)
+        last_id = batch[-1].id
+
+
+def _fill_summary(order, items):
+    order.item_count = sum(item.quantity for item in items)
+    if items:
+        product = items[0].product
+        variants = product.image_variants or {}
+        order.first_item_name = product.name
+        if variants.get('source') == product.image.name and 'thumb' in variants:
+            order.first_item_image = variants['thumb']['jpeg']
+        else:
+            order.first_item_image = product.image.name or ''
+    order.shipping_address = {field: getattr(order.address, field) for field in ADDRESS_FIELDS}
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0007_job_queue'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='order',
+            name='first_item_image',
+            field=models.CharField(blank=True, max_length=255),
+        ),
+        migrations.AddField(
+            model_name='order',
+            name='first_item_name',
+            field=models.CharField(blank=True, max_length=255),
+        ),
+        migrations.AddField(
+            model_name='order',
+            name='item_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='order',
+            name='shipping_address',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+        migrations.RunPython(backfill_order_summaries, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 5.2.8 on 2026-10-17 22:47
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0009_order_archive'),
+        ('users', '0003_user_user_joined_keyset_idx'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(fields=['user', 'updated_at', 'id'], name='order_user_updated_idx'),
+        ),
+    ]
@@ -0,0 +1,65 @@
+# Generated by Django 5.2.8 on 2026-10-17 22:52
+
+from django.db import migrations, models
+from django.db.models import Count, Sum
+from django.db.models.functions import TruncDate
+
+
+def backfill_sales_rollups(apps, schema_editor):
+    DailySales = apps.get_model('orders', 'DailySales')
+    SalesTotals = apps.get_model('orders', 'SalesTotals')
+    days = {}
+    for model_name in ('Order', 'ArchivedOrder'):
+        rows = apps.get_model('orders', model_name).objects.order_by().annotate(day=TruncDate('created_at')).values(
+            'day'
+        ).annotate(count=Count('id'), revenue=Sum('total_amount'))
+        for row in rows:
+            entry = days.setdefault(row['day'], {'order_count': 0, 'revenue': 0, 'new_customers': 0})
+            entry['order_count'] += row['count']
+            entry['revenue'] += row['revenue'] or 0
+    User = apps.get_model('users', 'User')
+    joined = User.objects.filter(is_staff=False).order_by().annotate(day=TruncDate('date_joined')).values(
+        'day'
+    ).annotate(count=Count('id'))
+    for row in joined:
+        days.setdefault(row['day'], {'order_count': 0, 'revenue': 0, 'new_customers': 0})['new_customers'] = row['count']
+    DailySales.objects.bulk_create([DailySales(date=day, **values) for day, values in days.items()], batch_size=1000)
+    SalesTotals.objects.create(
+        id=1,
+        order_count=sum(values['order_count'] for values in days.values()),
+        revenue=sum(values['revenue'] for values in days.values()),
+        customer_count=sum(values['new_customers'] for values in days.values()),
+        product_count=apps.get_model('shop', 'Product').objects.filter(is_deleted=False).count(),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0010_order_user_updated_idx'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailySales',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField(unique=True)),
+                ('order_count', models.PositiveIntegerField(default=0)),
+                ('revenue', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('new_customers', models.PositiveIntegerField(default=0)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='SalesTotals',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('order_count', models.PositiveIntegerField(default=0)),
+                ('revenue', models.DecimalField(decimal_places=2, default=0, max_digits=16)),
+                ('customer_count', models.PositiveIntegerField(default=0)),
+                ('product_count', models.PositiveIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.RunPython(backfill_sales_rollups, migrations.RunPython.noop),
+    ]
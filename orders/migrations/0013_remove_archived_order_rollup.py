@@ -0,0 +1,16 @@
+# Generated by Django 5.2.8 on 2026-10-17 23:07
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0012_order_grid_indexes'),
+    ]
+
+    operations = [
+        migrations.DeleteModel(
+            name='ArchivedOrderRollup',
+        ),
+    ]
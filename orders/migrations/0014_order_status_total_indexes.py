@@ -0,0 +1,24 @@
+# Generated by Django 5.2.8 on 2026-10-17 23:36
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0013_remove_archived_order_rollup'),
+        ('users', '0003_user_user_joined_keyset_idx'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='archivedorder',
+            index=models.Index(fields=['status', 'total_amount', 'id'], name='archived_order_st_total_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(fields=['status', 'total_amount', 'id'], name='order_status_total_idx'),
+        ),
+    ]
@@ -1,3 +1,4 @@
+from django.core.files.storage import default_storage
 from django.db import models
 from django.contrib.auth import get_user_model
 
@@ -20,12 +21,34 @@ class Order(models.Model):
     address = models.ForeignKey(Address, on_delete=models.CASCADE)
     status = models.CharField(max_length=255, choices=OrderStatus.choices, default=OrderStatus.PENDING)
     total_amount = models.DecimalField(max_digits=10, decimal_places=2)
+    item_count = models.PositiveIntegerField(default=0)
+    first_item_name = models.CharField(max_length=255, blank=True)
+    first_item_image = models.CharField(max_length=255, blank=True)
+    shipping_address = models.JSONField(default=dict, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
     def __str__(self):
         return f"Order {self.id} of {self.user.username}"
 
+    @property
+    def first_item_image_url(self):
+        return default_storage.url(self.first_item_image) if self.first_item_image else None
+
+    @property
+    def delivery_address(self):
+        return self.shipping_address or self.address
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', 'created_at', 'id'], name='order_user_keyset_idx'),
+            models.Index(fields=['created_at', 'id'], name='order_created_keyset_idx'),
+            models.Index(fields=['user', 'updated_at', 'id'], name='order_user_updated_idx'),
+            models.Index(fields=['status', 'created_at', 'id'], name='order_status_created_idx'),
+            models.Index(fields=['total_amount', 'id'], name='order_total_keyset_idx'),
+            models.Index(fields=['status', 'total_amount', 'id'], name='order_status_total_idx'),
+        ]
+
 
 class OrderItem(models.Model):
     order = models.ForeignKey(Order, on_delete=models.CASCADE, related_name='order_items')
@@ -36,4 +59,178 @@ class OrderItem(models.Model):
 
     def __str__(self):
         return f"{self.quantity} x {self.product.name} in Order {self.order.id}"
-    
\ No newline at end of file
+
+
+class ArchivedOrder(models.Model):
+    id = models.BigIntegerField(primary_key=True)
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='archived_orders')
+    status = models.CharField(max_length=255, choices=OrderStatus.choices)
+    total_amount = models.DecimalField(max_digits=10, decimal_places=2)
+    item_count = models.PositiveIntegerField(default=0)
+    first_item_name = models.CharField(max_length=255, blank=True)
+    first_item_image = models.CharField(max_length=255, blank=True)
+    shipping_address = models.JSONField(default=dict, blank=True)
+    period = models.PositiveIntegerField()
+    created_at = models.DateTimeField()
+    updated_at = models.DateTimeField()
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    is_archived = True
+
+    def __str__(self):
+        return f"Archived order {self.id} of {self.user.username}"
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['period', 'id'], name='archived_order_period_idx'),
+            models.Index(fields=['user', 'created_at', 'id'], name='archived_order_user_idx'),
+            models.Index(fields=['created_at', 'id'], name='archived_order_created_idx'),
+            models.Index(fields=['status', 'created_at', 'id'], name='archived_order_status_idx'),
+            models.Index(fields=['total_amount', 'id'], name='archived_order_total_idx'),
+            models.Index(fields=['status', 'total_amount', 'id'], name='archived_order_st_total_idx'),
+        ]
+
+    @property
+    def first_item_image_url(self):
+        return default_storage.url(self.first_item_image) if self.first_item_image else None
+
+    @property
+    def delivery_address(self):
+        return self.shipping_address
+
+
+class ArchivedOrderItem(models.Model):
+    id = models.BigIntegerField(primary_key=True)
+    order = models.ForeignKey(ArchivedOrder, on_delete=models.CASCADE, related_name='order_items')
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='archived_order_items')
+    quantity = models.IntegerField()
+    price = models.DecimalField(max_digits=10, decimal_places=2)
+    created_at = models.DateTimeField()
+
+    def __str__(self):
+        return f"{self.quantity} x {self.product.name} in archived Order {self.order_id}"
+
+
+class ProductCooccurrence(models.Model):
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='+')
+    other = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='+')
+    count = models.PositiveIntegerField()
+
+    def __str__(self):
+        return f"{self.product_id} & {self.other_id} bought together {self.count} times"
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['product', 'other'], name='unique_product_cooccurrence')
+        ]
+
+
+class ProductRecommendation(models.Model):
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='recommendations')
+    recommended = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='+')
+    score = models.FloatField()
+    rank = models.PositiveSmallIntegerField()
+
+    def __str__(self):
+        return f"#{self.rank} recommendation for {self.product_id}: {self.recommended_id}"
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['product', 'rank'], name='recommendation_lookup_idx'),
+        ]
+
+
+class RecommendationBuild(models.Model):
+    last_order_id = models.BigIntegerField()
+    orders_processed = models.PositiveIntegerField(default=0)
+    products_updated = models.PositiveIntegerField(default=0)
+    full_rebuild = models.BooleanField(default=False)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"Recommendation build up to order {self.last_order_id}"
+
+
+class StockReservation(models.Model):
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='stock_reservations')
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='reservations')
+    quantity = models.PositiveIntegerField()
+    expires_at = models.DateTimeField(db_index=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.quantity} x {self.product_id} held for {self.user_id} until {self.expires_at}"
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'product'], name='unique_user_product_reservation')
+        ]
+
+
+class IdempotencyKey(models.Model):
+    scope = models.CharField(max_length=128)
+    key = models.CharField(max_length=255)
+    request_hash = models.CharField(max_length=64)
+    status_code = models.PositiveSmallIntegerField(null=True, blank=True)
+    content_type = models.CharField(max_length=255, blank=True)
+    location = models.CharField(max_length=2048, blank=True)
+    body = models.BinaryField(default=bytes)
+    expires_at = models.DateTimeField(db_index=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"Idempotency key {self.key} for {self.scope}"
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['scope', 'key'], name='unique_idempotency_scope_key')
+        ]
+
+
+class JobStatus(models.TextChoices):
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    FAILED = 'failed'
+
+
+class Job(models.Model):
+    name = models.CharField(max_length=100)
+    payload = models.JSONField(default=dict, blank=True)
+    status = models.CharField(max_length=20, choices=JobStatus.choices, default=JobStatus.QUEUED)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    max_attempts = models.PositiveSmallIntegerField(default=5)
+    run_at = models.DateTimeField()
+    claimed_by = models.CharField(max_length=64, blank=True)
+    claimed_at = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Job {self.id} {self.name} ({self.status})"
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'run_at', 'id'], name='job_claim_idx'),
+        ]
+
+
+class DailySales(models.Model):
+    date = models.DateField(unique=True)
+    order_count = models.PositiveIntegerField(default=0)
+    revenue = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    new_customers = models.PositiveIntegerField(default=0)
+
+    def __str__(self):
+        return f"Sales on {self.date}: {self.order_count} orders"
+
+
+class SalesTotals(models.Model):
+    order_count = models.PositiveIntegerField(default=0)
+    revenue = models.DecimalField(max_digits=16, decimal_places=2, default=0)
+    customer_count = models.PositiveIntegerField(default=0)
+    product_count = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Sales totals: {self.order_count} orders, {self.revenue} revenue"
@@ -0,0 +1,202 @@
+import logging
+from datetime import timedelta
+
+import numpy as np
+from django.db import transaction
+from django.db.models import F, Max
+from django.utils import timezone
+
+from orders.models import (
+    ArchivedOrder, ArchivedOrderItem, Order, OrderItem, OrderStatus, ProductCooccurrence, ProductRecommendation,
+    RecommendationBuild,
+)
+from shop.models import Product
+
+logger = logging.getLogger('orders')
+
+CHUNK_ORDERS = 5000
+TOP_N = 10
+WRITE_BATCH_SIZE = 2000
+MERGE_EVERY = 8
+# Incremental builds only add orders placed since the previous build, so
+# orders cancelled afterwards keep their counts. A full recount runs at least
+# this often to correct that drift.
+FULL_REBUILD_INTERVAL = timedelta(days=7)
+# Orders younger than this are left for the next build so a lower id that
+# commits after a higher one is not skipped by the id high-water mark.
+COMMIT_LAG = timedelta(minutes=5)
+
+
+def _order_item_chunks(after_order_id, chunk_orders, placed_before):
+    # Archived orders keep their original ids, so hot and archived history are
+    # walked together as one id range.
+    last = after_order_id
+    while True:
+        order_ids = sorted(
+            pk for model in (Order, ArchivedOrder)
+            for pk in model.objects.filter(id__gt=last, created_at__lt=placed_before).order_by('id').values_list(
+                'id', flat=True
+            )[:chunk_orders]
+        )[:chunk_orders]
+        if not order_ids:
+            return
+        upper = order_ids[-1]
+        rows = []
+        for model in (OrderItem, ArchivedOrderItem):
+            rows.extend(model.objects.filter(
+                order_id__gt=last, order_id__lte=upper, order__created_at__lt=placed_before
+            ).exclude(order__status=OrderStatus.CANCELLED).order_by().values_list('order_id', 'product_id'))
+        pairs = np.array(rows, dtype=np.int64).reshape(-1, 2)
+        yield upper, len(order_ids), pairs
+        last = upper
+
+
+def _pair_counts(pairs, stride):
+    # Expand every order's distinct products into all (a, b) pairs, including
+    # a == b which counts how many orders contained the product at all.
+    if not len(pairs):
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+    pairs = np.unique(pairs, axis=0)
+    orders, products = pairs[:, 0], pairs[:, 1]
+    starts = np.flatnonzero(np.r_[True, orders[1:] != orders[:-1]])
+    sizes = np.diff(np.r_[starts, len(orders)])
+    row_size = np.repeat(sizes, sizes)
+    row_start = np.repeat(starts, sizes)
+    left = np.repeat(np.arange(len(orders)), row_size)
+    offsets = np.arange(left.size) - np.repeat(np.cumsum(row_size) - row_size, row_size)
+    right = np.repeat(row_start, row_size) + offsets
+    return np.unique(products[left] * stride + products[right], return_counts=True)
+
+
+def _merge(parts):
+    keys = np.concatenate([part[0] for part in parts])
+    counts = np.concatenate([part[1] for part in parts])
+    keys, inverse = np.unique(keys, return_inverse=True)
+    return keys, np.bincount(inverse, weights=counts).astype(np.int64)
+
+
+def count_cooccurrences(after_order_id, stride, chunk_orders=CHUNK_ORDERS, placed_before=None):
+    placed_before = placed_before or timezone.now() - COMMIT_LAG
+    parts, last_order_id, orders_processed = [], after_order_id, 0
+    for last_order_id, order_count, pairs in _order_item_chunks(after_order_id, chunk_orders, placed_before):
+        orders_processed += order_count
+        parts.append(_pair_counts(pairs, stride))
+        if len(parts) >= MERGE_EVERY:
+            parts = [_merge(parts)]
+    if not parts:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64), last_order_id, orders_processed
+    keys, counts = _merge(parts)
+    return keys, counts, last_order_id, orders_processed
+
+
+def _store_cooccurrences(keys, counts, stride, full):
+    left, right = np.divmod(keys, stride)
+    if full:
+        ProductCooccurrence.objects.all().delete()
+        existing = {}
+    else:
+        existing = {}
+        affected = np.unique(left).tolist()
+        for start in range(0, len(affected), 500):
+            rows = ProductCooccurrence.objects.filter(product_id__in=affected[start:start + 500]).values_list(
+                'product_id', 'other_id', 'count'
+            )
+            existing.update(((product_id, other_id), count) for product_id, other_id, count in rows)
+
+    batch = []
+    for product_id, other_id, count in zip(left.tolist(), right.tolist(), counts.tolist()):
+        total = existing.get((product_id, other_id), 0) + count
+        batch.append(ProductCooccurrence(product_id=product_id, other_id=other_id, count=total))
+        if len(batch) >= WRITE_BATCH_SIZE:
+            ProductCooccurrence.objects.bulk_create(
+                batch, update_conflicts=True, unique_fields=['product', 'other'], update_fields=['count']
+            )
+            batch = []
+    if batch:
+        ProductCooccurrence.objects.bulk_create(
+            batch, update_conflicts=True, unique_fields=['product', 'other'], update_fields=['count']
+        )
+    return np.unique(left)
+
+
+def rebuild_recommendations(product_ids, top_n=TOP_N, chunk_size=500):
+    product_ids = [int(pk) for pk in product_ids]
+    updated = 0
+    for start in range(0, len(product_ids), chunk_size):
+        chunk = product_ids[start:start + chunk_size]
+        rows = np.array(
+            list(ProductCooccurrence.objects.filter(product_id__in=chunk).values_list('product_id', 'other_id', 'count')),
+            dtype=np.int64,
+        ).reshape(-1, 3)
+        others = np.unique(rows[:, 1]).tolist()
+        frequency = {}
+        for offset in range(0, len(others), chunk_size):
+            window = others[offset:offset + chunk_size]
+            frequency.update(
+                ProductCooccurrence.objects.filter(product_id__in=window, other_id=F('product_id')).values_list(
+                    'product_id', 'count'
+                )
+            )
+        recommendations = []
+        pairs = rows[rows[:, 0] != rows[:, 1]]
+        if len(pairs):
+            own = np.array([frequency.get(pk, 1) for pk in pairs[:, 0].tolist()], dtype=np.float64)
+            their = np.array([frequency.get(pk, 1) for pk in pairs[:, 1].tolist()], dtype=np.float64)
+            scores = pairs[:, 2] / np.sqrt(own * their)
+            order = np.lexsort((-pairs[:, 2], -scores, pairs[:, 0]))
+            pairs, scores = pairs[order], scores[order]
+            starts = np.flatnonzero(np.r_[True, pairs[1:, 0] != pairs[:-1, 0]])
+            ranks = np.arange(len(pairs)) - np.repeat(starts, np.diff(np.r_[starts, len(pairs)]))
+            keep = ranks < top_n
+            for (product_id, other_id, _), score, rank in zip(pairs[keep].tolist(), scores[keep].tolist(), ranks[keep].tolist()):
+                recommendations.append(ProductRecommendation(
+                    product_id=product_id, recommended_id=other_id, score=score, rank=rank + 1
+                ))
+        with transaction.atomic():
+            ProductRecommendation.objects.filter(product_id__in=chunk).delete()
+            ProductRecommendation.objects.bulk_create(recommendations, batch_size=WRITE_BATCH_SIZE)
+        updated += len(chunk)
+    return updated
+
+
+def build_recommendations(full=False, top_n=TOP_N, chunk_orders=CHUNK_ORDERS):
+    previous = RecommendationBuild.objects.order_by('-id').first()
+    last_full = RecommendationBuild.objects.filter(full_rebuild=True).order_by('-id').values_list('created_at', flat=True).first()
+    full = full or previous is None or last_full is None or last_full <= timezone.now() - FULL_REBUILD_INTERVAL
+    after_order_id = 0 if full else previous.last_order_id
+    stride = (Product.objects.aggregate(max_id=Max('id'))['max_id'] or 0) + 1
+
+    keys, counts, last_order_id, orders_processed = count_cooccurrences(after_order_id, stride, chunk_orders=chunk_orders)
+    with transaction.atomic():
+        affected = _store_cooccurrences(keys, counts, stride, full)
+    # A full rebuild swaps every recommendation in one transaction so the site
+    # keeps serving the previous set until the new one is complete.
+    with transaction.atomic():
+        if full:
+            ProductRecommendation.objects.all().delete()
+        products_updated = rebuild_recommendations(affected.tolist(), top_n=top_n)
+    build = RecommendationBuild.objects.create(
+        last_order_id=last_order_id,
+        orders_processed=orders_processed,
+        products_updated=products_updated,
+        full_rebuild=full,
+    )
+    logger.info(f"Recommendations built: full={full}, last_order_id={last_order_id}, orders={orders_processed}, products={products_updated}")
+    return build
+
+
+def latest_build():
+    return RecommendationBuild.objects.order_by('-id').values('id', 'created_at').first()
+
+
+def recommended_products(product_ids, limit=4):
+    product_ids = list(product_ids)
+    recommendations = ProductRecommendation.objects.filter(
+        product_id__in=product_ids, recommended__is_active=True, recommended__is_deleted=False
+    ).exclude(recommended_id__in=product_ids).select_related('recommended').order_by('rank', '-score')[:limit * 4]
+    products = {}
+    for recommendation in recommendations:
+        products.setdefault(recommendation.recommended_id, recommendation.recommended)
+        if len(products) >= limit:
+            break
+    return list(products.values())
@@ -0,0 +1,123 @@
+import logging
+from collections import Counter
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import Case, F, IntegerField, OuterRef, Subquery, Sum, Value, When
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from orders.models import StockReservation
+from shop.models import Product
+
+logger = logging.getLogger('orders')
+
+RESERVATION_TTL = timedelta(minutes=15)
+SWEEP_BATCH_SIZE = 500
+
+
+class ReservationError(Exception):
+    pass
+
+
+def quantity_case(quantities):
+    return Case(
+        *[When(pk=product_id, then=Value(quantity)) for product_id, quantity in quantities.items()],
+        output_field=IntegerField(),
+    )
+
+
+def held_by(user):
+    return Coalesce(Subquery(
+        StockReservation.objects.filter(user=user, product_id=OuterRef('product_id')).values('quantity')[:1]
+    ), 0)
+
+
+def available_to(user, product):
+    # The user's own hold is already counted in reserved_stock and gets
+    # released when they reserve again, so it is available to them.
+    held = StockReservation.objects.filter(user=user, product=product).values_list('quantity', flat=True).first() or 0
+    return max(product.available_stock + held, 0)
+
+
+def availability_message(quantities):
+    products = Product.objects.filter(pk__in=quantities).values_list(
+        'id', 'name', 'stock', 'reserved_stock', 'is_active', 'is_deleted'
+    )
+    messages = []
+    for product_id, name, stock, reserved_stock, is_active, is_deleted in products:
+        available = max(stock - reserved_stock, 0)
+        if not is_active or is_deleted:
+            messages.append(f'Product {name} is no longer available.')
+        elif available < quantities[product_id]:
+            messages.append(f'Sorry, only {available} {name}(s) left in stock.')
+    return ' '.join(messages) or 'Some items in your cart are no longer available.'
+
+
+def release(reservations):
+    # Rows are locked before the counters move so a sweeper and a checkout
+    # releasing the same hold cannot both decrement reserved_stock.
+    rows = list(reservations.select_for_update().order_by('id').values_list('id', 'product_id', 'quantity'))
+    if not rows:
+        return 0
+    held = Counter()
+    for _, product_id, quantity in rows:
+        held[product_id] += quantity
+    StockReservation.objects.filter(pk__in=[row[0] for row in rows]).delete()
+    decrement = quantity_case(held)
+    # reserved_stock is not part of any cached or synced payload, so holds
+    # leave updated_at (the content version) alone.
+    Product.objects.filter(pk__in=held).update(reserved_stock=F('reserved_stock') - decrement)
+    return len(rows)
+
+
+def reserve_cart(user, cart_items, ttl=RESERVATION_TTL):
+    quantities = Counter()
+    for item in cart_items:
+        quantities[item.product_id] += item.quantity
+    expires_at = timezone.now() + ttl
+    try:
+        with transaction.atomic():
+            release(StockReservation.objects.filter(user=user))
+            if not quantities:
+                return None
+            increment = quantity_case(quantities)
+            reserved = Product.objects.filter(
+                pk__in=quantities, is_active=True, is_deleted=False, stock__gte=F('reserved_stock') + increment
+            ).update(reserved_stock=F('reserved_stock') + increment)
+            if reserved != len(quantities):
+                raise ReservationError()
+            StockReservation.objects.bulk_create([
+                StockReservation(user=user, product_id=product_id, quantity=quantity, expires_at=expires_at)
+                for product_id, quantity in quantities.items()
+            ])
+    except ReservationError:
+        raise ReservationError(availability_message(quantities)) from None
+    logger.info(f"Stock reserved: products={len(quantities)}, expires_at={expires_at.isoformat()}, user={user.email}")
+    return expires_at
+
+
+def release_expired(batch_size=SWEEP_BATCH_SIZE):
+    released = 0
+    while True:
+        with transaction.atomic():
+            ids = list(StockReservation.objects.filter(expires_at__lte=timezone.now()).order_by('expires_at').values_list(
+                'id', flat=True
+            )[:batch_size])
+            if not ids:
+                break
+            released += release(StockReservation.objects.filter(pk__in=ids, expires_at__lte=timezone.now()))
+    if released:
+        logger.info(f"Expired stock reservations released: count={released}")
+    return released
+
+
+def recount_reserved_stock():
+    with transaction.atomic():
+        held = dict(StockReservation.objects.order_by().values('product_id').annotate(total=Sum('quantity')).values_list(
+            'product_id', 'total'
+        ))
+        drifted = Product.objects.exclude(pk__in=held).exclude(reserved_stock=0).update(reserved_stock=0)
+        for product_id, total in held.items():
+            drifted += Product.objects.filter(pk=product_id).exclude(reserved_stock=total).update(reserved_stock=total)
+    return drifted
@@ -0,0 +1,143 @@
+import logging
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import Count, F, Sum
+from django.db.models.functions import TruncDate, TruncMonth, TruncWeek
+from django.utils import timezone
+
+from orders.models import ArchivedOrder, DailySales, Order, SalesTotals
+from shop.models import Product
+
+logger = logging.getLogger('orders')
+
+TOTALS_ID = 1
+CHART_RANGES = {
+    'day': (None, 30),
+    'week': (TruncWeek, 12),
+    'month': (TruncMonth, 12),
+}
+
+
+def _local_date(value):
+    return timezone.localtime(value).date()
+
+
+def _customers():
+    return get_user_model().objects.filter(is_staff=False)
+
+
+def _live_product_count():
+    return Product.objects.filter(is_deleted=False).count()
+
+
+def _bump(day, **deltas):
+    # Creating the row first keeps every increment a single conditional-free
+    # UPDATE ... SET col = col + n, safe under concurrent writers.
+    DailySales.objects.bulk_create([DailySales(date=day)], ignore_conflicts=True)
+    DailySales.objects.filter(date=day).update(**{name: F(name) + value for name, value in deltas.items()})
+
+
+def _update_totals(**values):
+    SalesTotals.objects.bulk_create([SalesTotals(id=TOTALS_ID)], ignore_conflicts=True)
+    SalesTotals.objects.filter(id=TOTALS_ID).update(updated_at=timezone.now(), **values)
+
+
+def _bump_totals(**deltas):
+    _update_totals(**{name: F(name) + value for name, value in deltas.items()})
+
+
+def _apply_after_commit(day=None, daily=None, totals=None):
+    # Applied once the write commits, so checkouts never queue on the shared
+    # totals row lock inside their own transaction.
+    def apply():
+        with transaction.atomic():
+            if daily:
+                _bump(day, **daily)
+            _bump_totals(**totals)
+
+    transaction.on_commit(apply)
+
+
+def record_order(order):
+    deltas = {'order_count': 1, 'revenue': order.total_amount}
+    _apply_after_commit(_local_date(order.created_at), daily=deltas, totals=deltas)
+
+
+def record_customer(user, delta=1):
+    _apply_after_commit(_local_date(user.date_joined), daily={'new_customers': delta}, totals={'customer_count': delta})
+
+
+def record_product(delta):
+    _apply_after_commit(totals={'product_count': delta})
+
+
+def sales_totals():
+    totals = SalesTotals.objects.filter(id=TOTALS_ID).first()
+    if totals is None:
+        totals = rebuild_sales_rollups()
+    return totals
+
+
+def _period_starts(trunc, periods, today):
+    if trunc is None:
+        return [today - timedelta(days=offset) for offset in range(periods - 1, -1, -1)]
+    if trunc is TruncWeek:
+        monday = today - timedelta(days=today.weekday())
+        return [monday - timedelta(weeks=offset) for offset in range(periods - 1, -1, -1)]
+    current = today.year * 12 + today.month - 1
+    return [
+        today.replace(year=month // 12, month=month % 12 + 1, day=1)
+        for month in range(current - periods + 1, current + 1)
+    ]
+
+
+def sales_series(chart_range='day', today=None):
+    trunc, periods = CHART_RANGES[chart_range]
+    starts = _period_starts(trunc, periods, today or timezone.localdate())
+    # DailySales rows are already one per day; only coarser ranges need truncating.
+    period = F('date') if trunc is None else trunc('date')
+    rows = DailySales.objects.filter(date__gte=starts[0]).values(period=period).annotate(
+        orders=Sum('order_count'), revenue=Sum('revenue'), new_customers=Sum('new_customers'),
+    ).order_by()
+    by_period = {row['period']: row for row in rows}
+    series = []
+    for start in starts:
+        row = by_period.get(start, {})
+        series.append({
+            'period': start.isoformat(),
+            'orders': row.get('orders', 0),
+            'revenue': f"{row.get('revenue') or 0:.2f}",
+            'new_customers': row.get('new_customers', 0),
+        })
+    return series
+
+
+def rebuild_sales_rollups():
+    days = {}
+    for model in (Order, ArchivedOrder):
+        rows = model.objects.order_by().annotate(day=TruncDate('created_at')).values('day').annotate(
+            count=Count('id'), revenue=Sum('total_amount')
+        )
+        for row in rows:
+            entry = days.setdefault(row['day'], DailySales(date=row['day']))
+            entry.order_count += row['count']
+            entry.revenue += row['revenue'] or 0
+    joined = _customers().order_by().annotate(day=TruncDate('date_joined')).values('day').annotate(count=Count('id'))
+    for row in joined:
+        days.setdefault(row['day'], DailySales(date=row['day'])).new_customers = row['count']
+
+    with transaction.atomic():
+        DailySales.objects.all().delete()
+        DailySales.objects.bulk_create(days.values(), batch_size=1000)
+        totals = SalesTotals(
+            id=TOTALS_ID,
+            order_count=sum(day.order_count for day in days.values()),
+            revenue=sum((day.revenue for day in days.values()), 0),
+            customer_count=sum(day.new_customers for day in days.values()),
+            product_count=_live_product_count(),
+        )
+        totals.save()
+    logger.info(f"Sales rollups rebuilt: days={len(days)}, orders={totals.order_count}, revenue={totals.revenue}")
+    return totals
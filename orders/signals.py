@@ -0,0 +1,47 @@
+from django.contrib.auth import get_user_model
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from orders.models import Order
+from orders.rollups import record_customer, record_order, record_product
+from shop.models import Product
+
+
+@receiver(post_save, sender=Order)
+def roll_up_order(sender, instance, created, raw, **kwargs):
+    if created and not raw:
+        record_order(instance)
+
+
+@receiver(post_save, sender=get_user_model())
+def roll_up_new_customer(sender, instance, created, raw, **kwargs):
+    if created and not raw and not instance.is_staff:
+        record_customer(instance)
+
+
+@receiver(post_delete, sender=get_user_model())
+def roll_up_removed_customer(sender, instance, **kwargs):
+    if not instance.is_staff:
+        record_customer(instance, delta=-1)
+
+
+@receiver(pre_save, sender=Product)
+def remember_product_deleted(sender, instance, raw, update_fields=None, **kwargs):
+    instance._was_deleted = None
+    if instance.pk and not raw and (update_fields is None or 'is_deleted' in update_fields):
+        instance._was_deleted = sender.objects.filter(pk=instance.pk).values_list('is_deleted', flat=True).first()
+
+
+@receiver(post_save, sender=Product)
+def roll_up_product_count(sender, instance, created, raw, **kwargs):
+    if raw:
+        return
+    was_deleted = True if created else getattr(instance, '_was_deleted', None)
+    if was_deleted is not None and was_deleted != instance.is_deleted:
+        record_product(-1 if instance.is_deleted else 1)
+
+
+@receiver(post_delete, sender=Product)
+def roll_up_removed_product(sender, instance, **kwargs):
+    if not instance.is_deleted:
+        record_product(-1)
@@ -0,0 +1,44 @@
+import logging
+
+from django.core.mail import send_mail
+
+from orders.jobs import task
+from orders.models import Order
+from shop.images import generate_variants
+
+logger = logging.getLogger('orders')
+
+
+@task('shop.generate_image_variants')
+def generate_image_variants(product_id, force=False):
+    generate_variants(product_id, force=force)
+
+
+@task('orders.send_order_confirmation')
+def send_order_confirmation(order_id):
+    order = Order.objects.select_related('user').filter(pk=order_id).first()
+    if order is None:
+        return
+    items = order.order_items.select_related('product')
+    lines = '\n'.join(f'{item.quantity} x {item.product.name} - ₹{item.price}' for item in items)
+    send_mail(
+        f'Your Shoppe order #{order.id}',
+        f'Hi {order.user.name},\n\nThanks for your order.\n\n{lines}\n\nTotal: ₹{order.total_amount}',
+        None,
+        [order.user.email],
+    )
+    logger.info(f"Order confirmation sent: order_id={order.id}, user={order.user.email}")
+
+
+@task('orders.send_status_update')
+def send_status_update(order_id, old_status, new_status):
+    order = Order.objects.select_related('user').filter(pk=order_id).first()
+    if order is None:
+        return
+    send_mail(
+        f'Your Shoppe order #{order.id} is {order.get_status_display().lower()}',
+        f'Hi {order.user.name},\n\nYour order #{order.id} changed from {old_status} to {new_status}.',
+        None,
+        [order.user.email],
+    )
+    logger.info(f"Order status update sent: order_id={order.id}, status={new_status}, user={order.user.email}")
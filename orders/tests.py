@@ -1,3 +1,511 @@
-from django.test import TestCase
+import importlib
+import io
+import shutil
+import tempfile
+from datetime import date, timedelta
+from decimal import Decimal
+from unittest import mock
 
-# Create your tests here.
+from django.apps import apps
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from orders.archive import archive_orders, find_order, period_of
+from orders.checkout import CheckoutError, place_order
+from orders.jobs import _handlers, claim, enqueue, requeue_stale, run_job, task
+from orders.models import (
+    ArchivedOrder, ArchivedOrderItem, DailySales, IdempotencyKey, Job, JobStatus, Order, OrderItem, OrderStatus, ProductRecommendation,
+    RecommendationBuild, StockReservation,
+)
+from orders.recommendations import build_recommendations
+from orders.reservations import release_expired, reserve_cart
+from orders.rollups import rebuild_sales_rollups, sales_series, sales_totals
+from PIL import Image
+from shop.models import Product
+from users.cart import reconcile_cart
+from users.models import Address, Cart, CartItem, User
+
+
+def create_order(user, address, products, status=OrderStatus.PENDING, **fields):
+    order = Order.objects.create(
+        user=user, address=address, status=status,
+        total_amount=sum((product.price for product in products), Decimal('0')), **fields
+    )
+    OrderItem.objects.bulk_create([
+        OrderItem(order=order, product=product, quantity=1, price=product.price) for product in products
+    ])
+    return order
+
+
+class OrdersTestCase(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='buyer@example.com', email='buyer@example.com', password='pw')
+        self.address = Address.objects.create(
+            user=self.user, address_line_1='1 Main St', city='City', state='State', zip_code='12345', country='IN'
+        )
+        self.products = [
+            Product.objects.create(name=f'Product {i}', description='d', price=Decimal('10.00'), stock=5)
+            for i in range(3)
+        ]
+
+
+class OrderHistoryPaginationTests(OrdersTestCase):
+    def test_pages_merge_hot_and_archived_orders(self):
+        orders = [create_order(self.user, self.address, self.products[:1], status=OrderStatus.DELIVERED) for _ in range(25)]
+        Order.objects.filter(pk__in=[order.pk for order in orders[:5]]).update(created_at=timezone.now() - timedelta(days=400))
+        self.assertEqual(archive_orders(older_than_days=180), 5)
+        self.client.force_login(self.user)
+
+        first = self.client.get(reverse('orders:orders')).context['page']
+        second = self.client.get(reverse('orders:orders'), {'cursor': first.next_cursor}).context['page']
+
+        self.assertEqual(len(first), 20)
+        self.assertFalse(second.has_next)
+        self.assertEqual([order.id for order in [*first, *second]], [order.pk for order in reversed(orders)])
+        self.assertTrue(all(getattr(order, 'is_archived', False) for order in second))
+
+
+class OrderSummaryBackfillTests(OrdersTestCase):
+    def backfill(self):
+        migration = importlib.import_module('orders.migrations.0008_order_summary_fields')
+        with CaptureQueriesContext(connection) as queries:
+            migration.backfill_order_summaries(apps, None)
+        return len(queries)
+
+    def test_backfill_fills_summaries_with_a_fixed_query_count(self):
+        first, second, _ = self.products
+        orders = [create_order(self.user, self.address, [first, second]) for _ in range(3)]
+        empty = Order.objects.create(user=self.user, address=self.address, total_amount=Decimal('0'))
+        baseline = self.backfill()
+
+        order = Order.objects.get(pk=orders[0].pk)
+        self.assertEqual((order.item_count, order.first_item_name), (2, first.name))
+        self.assertEqual(order.shipping_address['city'], 'City')
+        self.assertEqual(Order.objects.get(pk=empty.pk).item_count, 0)
+
+        for _ in range(5):
+            create_order(self.user, self.address, [second])
+        self.assertEqual(self.backfill(), baseline)
+
+
+class ArchiveTests(OrdersTestCase):
+    def old_order(self, status, days=400):
+        order = create_order(self.user, self.address, self.products[:2], status=status)
+        Order.objects.filter(pk=order.pk).update(created_at=timezone.now() - timedelta(days=days))
+        return order
+
+    def test_moves_only_old_finished_orders_with_their_items(self):
+        delivered = self.old_order(OrderStatus.DELIVERED)
+        cancelled = self.old_order(OrderStatus.CANCELLED)
+        pending = self.old_order(OrderStatus.PENDING)
+        recent = self.old_order(OrderStatus.DELIVERED, days=10)
+        item_ids = set(OrderItem.objects.filter(order__in=[delivered, cancelled]).values_list('id', flat=True))
+        rebuild_sales_rollups()
+        totals = sales_totals().order_count, sales_totals().revenue
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(archive_orders(older_than_days=180, batch_size=1), 2)
+
+        self.assertEqual(set(ArchivedOrder.objects.values_list('id', flat=True)), {delivered.pk, cancelled.pk})
+        self.assertEqual(set(ArchivedOrderItem.objects.values_list('id', flat=True)), item_ids)
+        self.assertEqual(set(Order.objects.values_list('id', flat=True)), {pending.pk, recent.pk})
+        self.assertFalse(OrderItem.objects.filter(id__in=item_ids).exists())
+        archived = ArchivedOrder.objects.get(pk=delivered.pk)
+        self.assertEqual(archived.period, period_of(archived.created_at))
+        self.assertEqual((archived.total_amount, archived.status), (delivered.total_amount, OrderStatus.DELIVERED))
+        self.assertEqual((sales_totals().order_count, sales_totals().revenue), totals)
+
+    def test_archived_orders_stay_visible_to_their_owner(self):
+        order = self.old_order(OrderStatus.DELIVERED)
+        archive_orders(older_than_days=180)
+        self.assertTrue(find_order(order.pk, user=self.user).is_archived)
+        self.client.force_login(self.user)
+
+        response = self.client.get(reverse('orders:order_detail', args=[order.pk]))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.context['order_items']), 2)
+
+
+class RecommendationTests(OrdersTestCase):
+    def settled_order(self, products, **fields):
+        order = create_order(self.user, self.address, products, **fields)
+        Order.objects.filter(pk=order.pk).update(created_at=timezone.now() - timedelta(hours=1))
+        return order
+
+    def recommended(self, product):
+        return set(ProductRecommendation.objects.filter(product=product).values_list('recommended_id', flat=True))
+
+    def test_full_rebuild_includes_archived_orders(self):
+        first, second, third = self.products
+        old = create_order(self.user, self.address, [first, second], status=OrderStatus.DELIVERED)
+        Order.objects.filter(pk=old.pk).update(created_at=timezone.now() - timedelta(days=400))
+        self.assertEqual(archive_orders(older_than_days=180), 1)
+        self.settled_order([first, third])
+
+        build_recommendations(full=True)
+
+        self.assertEqual(self.recommended(first), {second.pk, third.pk})
+
+    def test_incremental_build_waits_for_recent_orders(self):
+        first, second, _ = self.products
+        build_recommendations(full=True)
+        order = create_order(self.user, self.address, [first, second])
+
+        build = build_recommendations()
+        self.assertEqual((build.full_rebuild, build.orders_processed), (False, 0))
+
+        Order.objects.filter(pk=order.pk).update(created_at=timezone.now() - timedelta(hours=1))
+        build = build_recommendations()
+        self.assertEqual((build.orders_processed, build.last_order_id), (1, order.pk))
+        self.assertEqual(self.recommended(first), {second.pk})
+
+    def test_periodic_full_rebuild_drops_cancelled_orders(self):
+        first, second, _ = self.products
+        order = self.settled_order([first, second])
+        build_recommendations(full=True)
+        Order.objects.filter(pk=order.pk).update(status=OrderStatus.CANCELLED)
+
+        self.assertFalse(build_recommendations().full_rebuild)
+        self.assertEqual(self.recommended(first), {second.pk})
+
+        RecommendationBuild.objects.update(created_at=timezone.now() - timedelta(days=8))
+        self.assertTrue(build_recommendations().full_rebuild)
+        self.assertEqual(self.recommended(first), set())
+
+
+class SalesRollupTests(OrdersTestCase):
+    def totals(self):
+        totals = sales_totals()
+        return totals.order_count, totals.revenue, totals.customer_count, totals.product_count
+
+    def test_incremental_updates_match_rebuild(self):
+        rebuild_sales_rollups()
+        with self.captureOnCommitCallbacks(execute=True):
+            create_order(self.user, self.address, self.products[:2])
+            User.objects.create_user(username='new@example.com', email='new@example.com', password='pw')
+            Product.objects.create(name='Extra', description='d', price=Decimal('5.00'), stock=1)
+        with self.captureOnCommitCallbacks(execute=True):
+            product = self.products[0]
+            product.is_deleted = True
+            product.save(update_fields=['is_deleted'])
+            self.products[1].save(update_fields=['stock'])
+        incremental = self.totals()
+        rebuild_sales_rollups()
+        self.assertEqual(incremental, self.totals())
+        self.assertEqual(incremental[3], 3)
+
+    def test_totals_wait_for_commit(self):
+        before = self.totals()
+        with self.captureOnCommitCallbacks() as callbacks:
+            create_order(self.user, self.address, self.products[:1])
+            self.assertEqual(self.totals(), before)
+        self.assertTrue(callbacks)
+
+    def test_series_groups_days_weeks_and_months(self):
+        DailySales.objects.bulk_create([
+            DailySales(date=date(2026, 3, 11), order_count=2, revenue=Decimal('20.00'), new_customers=1),
+            DailySales(date=date(2026, 3, 9), order_count=1, revenue=Decimal('10.00')),
+            DailySales(date=date(2026, 3, 2), order_count=1, revenue=Decimal('10.00')),
+            DailySales(date=date(2026, 2, 15), order_count=1, revenue=Decimal('10.00')),
+        ])
+        today = date(2026, 3, 11)
+
+        days = sales_series('day', today)
+        self.assertEqual(len(days), 30)
+        self.assertEqual(days[-1], {'period': '2026-03-11', 'orders': 2, 'revenue': '20.00', 'new_customers': 1})
+        self.assertEqual(days[-2]['orders'], 0)
+        self.assertEqual(days[-3]['orders'], 1)
+        weeks = sales_series('week', today)
+        self.assertEqual([(week['period'], week['orders']) for week in weeks[-2:]], [('2026-03-02', 1), ('2026-03-09', 3)])
+        months = sales_series('month', today)
+        self.assertEqual(len(months), 12)
+        self.assertEqual([(month['period'], month['revenue']) for month in months[-2:]], [('2026-02-01', '10.00'), ('2026-03-01', '40.00')])
+
+    def test_sales_chart_rejects_unknown_range(self):
+        admin = User.objects.create_user(username='admin@example.com', email='admin@example.com', password='pw', is_staff=True)
+        self.client.force_login(admin)
+        url = reverse('adminpanel:sales_chart')
+        self.assertEqual(len(self.client.get(url).json()['series']), 30)
+        self.assertEqual(self.client.get(url, {'range': 'year'}).status_code, 400)
+
+
+class ReservationTests(OrdersTestCase):
+    def setUp(self):
+        super().setUp()
+        self.other = User.objects.create_user(username='other@example.com', email='other@example.com', password='pw')
+
+    def add_to_cart(self, user, product, quantity):
+        cart, _ = Cart.objects.get_or_create(user=user)
+        return CartItem.objects.create(cart=cart, product=product, quantity=quantity)
+
+    def test_reserve_keeps_updated_at(self):
+        product = self.products[0]
+        self.add_to_cart(self.user, product, 2)
+
+        reserve_cart(self.user, CartItem.objects.filter(cart__user=self.user))
+
+        product_after = Product.objects.get(pk=product.pk)
+        self.assertEqual(product_after.reserved_stock, 2)
+        self.assertEqual(product_after.updated_at, product.updated_at)
+
+    def test_reconcile_clamps_against_other_holds(self):
+        product = self.products[0]
+        self.add_to_cart(self.other, product, 3)
+        reserve_cart(self.other, CartItem.objects.filter(cart__user=self.other))
+        item = self.add_to_cart(self.user, product, 4)
+
+        summary = reconcile_cart(self.user)
+
+        self.assertEqual(summary.clamped, [(product.pk, product.name, 2)])
+        item.refresh_from_db()
+        self.assertEqual(item.quantity, 2)
+
+    def test_reconcile_counts_own_hold_as_available(self):
+        product = self.products[0]
+        item = self.add_to_cart(self.user, product, 5)
+        reserve_cart(self.user, CartItem.objects.filter(cart__user=self.user))
+
+        summary = reconcile_cart(self.user)
+
+        self.assertEqual((summary.clamped, summary.removed), ([], 0))
+        item.refresh_from_db()
+        self.assertEqual(item.quantity, 5)
+
+    def test_admin_product_edits_keep_reserved_stock(self):
+        product = self.products[0]
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        buffer = io.BytesIO()
+        Image.new('RGB', (10, 10), 'red').save(buffer, 'JPEG')
+        self.add_to_cart(self.other, product, 3)
+        reserve_cart(self.other, CartItem.objects.filter(cart__user=self.other))
+        admin = User.objects.create_user(username='admin@example.com', email='admin@example.com', password='pw', is_staff=True)
+        self.client.force_login(admin)
+
+        with override_settings(MEDIA_ROOT=media_root), CaptureQueriesContext(connection) as queries:
+            self.client.post(reverse('adminpanel:product_update', args=[product.pk]), {
+                'name': 'Renamed', 'description': 'd', 'price': '12.00', 'stock': 8,
+                'image': SimpleUploadedFile('lamp.jpg', buffer.getvalue(), content_type='image/jpeg'),
+            })
+            self.client.get(reverse('adminpanel:product_status_change', args=[product.pk]))
+
+        # Concurrent checkouts move reserved_stock, so admin writes must not include it.
+        updates = [query['sql'] for query in queries if query['sql'].startswith('UPDATE "shop_product"')]
+        self.assertEqual(len(updates), 2)
+        self.assertFalse(any('"reserved_stock"' in sql for sql in updates))
+        product.refresh_from_db()
+        self.assertEqual((product.name, product.stock, product.is_active), ('Renamed', 8, False))
+        self.assertEqual(product.reserved_stock, 3)
+
+
+class OrderGridTests(OrdersTestCase):
+    def setUp(self):
+        super().setUp()
+        admin = User.objects.create_user(username='admin@example.com', email='admin@example.com', password='pw', is_staff=True)
+        self.client.force_login(admin)
+
+    def grid_order(self, status, total, days):
+        order = create_order(self.user, self.address, self.products[:1], status=status)
+        Order.objects.filter(pk=order.pk).update(total_amount=Decimal(total), created_at=timezone.now() - timedelta(days=days))
+        return order.pk
+
+    def grid_orders(self):
+        orders = {
+            'old': self.grid_order(OrderStatus.DELIVERED, '90.00', 400),
+            'delivered': self.grid_order(OrderStatus.DELIVERED, '20.00', 10),
+            'pending': self.grid_order(OrderStatus.PENDING, '20.00', 5),
+            'recent': self.grid_order(OrderStatus.DELIVERED, '50.00', 3),
+            'cancelled': self.grid_order(OrderStatus.CANCELLED, '5.00', 1),
+        }
+        self.assertEqual(archive_orders(older_than_days=180), 1)
+        return orders
+
+    def ids(self, **params):
+        response = self.client.get(reverse('adminpanel:orders_data'), params)
+        self.assertEqual(response.status_code, 200)
+        return [row['id'] for row in response.json()['rows']]
+
+    def test_customer_filter_matches_username_prefix(self):
+        other = User.objects.create_user(username='other@example.com', email='other@example.com', password='pw')
+        mine = create_order(self.user, self.address, self.products[:1])
+        create_order(other, self.address, self.products[:1])
+
+        response = self.client.get(reverse('adminpanel:orders_data'), {'customer': 'buyer@'})
+
+        self.assertEqual([row['id'] for row in response.json()['rows']], [mine.pk])
+        self.assertContains(self.client.get(reverse('adminpanel:orders')), 'placeholder="Username (registration email)"')
+
+    def test_sorts_merge_hot_and_archived_orders(self):
+        o = self.grid_orders()
+        self.assertEqual(self.ids(), [o['cancelled'], o['recent'], o['pending'], o['delivered'], o['old']])
+        self.assertEqual(self.ids(sort='oldest'), [o['old'], o['delivered'], o['pending'], o['recent'], o['cancelled']])
+        self.assertEqual(self.ids(sort='total_desc'), [o['old'], o['recent'], o['pending'], o['delivered'], o['cancelled']])
+        self.assertEqual(self.ids(sort='total_asc'), [o['cancelled'], o['delivered'], o['pending'], o['recent'], o['old']])
+
+    def test_status_and_date_filters(self):
+        o = self.grid_orders()
+        self.assertEqual(self.ids(status=OrderStatus.DELIVERED, sort='total_desc'), [o['old'], o['recent'], o['delivered']])
+        today = timezone.localdate()
+        window = {'date_from': today - timedelta(days=6), 'date_to': today - timedelta(days=2)}
+        self.assertEqual(self.ids(**window), [o['recent'], o['pending']])
+        self.assertEqual(self.ids(date_to=today - timedelta(days=300)), [o['old']])
+
+    def test_invalid_date_range_is_rejected(self):
+        today = timezone.localdate()
+        url = reverse('adminpanel:orders_data')
+        response = self.client.get(url, {'date_from': today, 'date_to': today - timedelta(days=1)})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('__all__', response.json()['errors'])
+        self.assertEqual(self.client.get(url, {'date_from': 'yesterday'}).status_code, 400)
+
+    def test_cursor_walks_total_sort_across_archive(self):
+        o = self.grid_orders()
+        seen, params = [], {'sort': 'total_asc', 'page_size': 2}
+        while True:
+            data = self.client.get(reverse('adminpanel:orders_data'), params).json()
+            seen += [row['id'] for row in data['rows']]
+            if not data['next_cursor']:
+                break
+            params['cursor'] = data['next_cursor']
+        self.assertEqual(seen, [o['cancelled'], o['delivered'], o['pending'], o['recent'], o['old']])
+
+    def test_status_filter_with_total_sort_uses_composite_index(self):
+        for model, index in ((Order, 'order_status_total_idx'), (ArchivedOrder, 'archived_order_st_total_idx')):
+            plan = model.objects.filter(status=OrderStatus.DELIVERED).order_by('-total_amount', '-id').explain()
+            self.assertIn(index, plan)
+
+
+class CheckoutTests(OrdersTestCase):
+    def setUp(self):
+        super().setUp()
+        self.product = self.products[0]
+        self.cart = Cart.objects.create(user=self.user)
+
+    def cart_items(self, user):
+        return list(CartItem.objects.filter(cart__user=user).select_related('product'))
+
+    def test_place_order_rejects_oversell(self):
+        other = User.objects.create_user(username='other@example.com', email='other@example.com', password='pw')
+        CartItem.objects.create(cart=Cart.objects.create(user=other), product=self.product, quantity=4)
+        reserve_cart(other, self.cart_items(other))
+        CartItem.objects.create(cart=self.cart, product=self.product, quantity=2)
+
+        with self.assertRaisesMessage(CheckoutError, 'only 1'):
+            place_order(self.user, self.address, self.cart_items(self.user))
+
+        self.product.refresh_from_db()
+        self.assertEqual((self.product.stock, self.product.reserved_stock), (5, 4))
+        self.assertFalse(Order.objects.exists())
+
+    def test_place_order_consumes_own_hold(self):
+        CartItem.objects.create(cart=self.cart, product=self.product, quantity=5)
+        reserve_cart(self.user, self.cart_items(self.user))
+
+        place_order(self.user, self.address, self.cart_items(self.user))
+
+        self.product.refresh_from_db()
+        self.assertEqual((self.product.stock, self.product.reserved_stock), (0, 0))
+        self.assertFalse(StockReservation.objects.exists())
+
+    def test_release_expired_frees_held_stock(self):
+        CartItem.objects.create(cart=self.cart, product=self.product, quantity=3)
+        reserve_cart(self.user, self.cart_items(self.user), ttl=timedelta(seconds=-1))
+
+        self.assertEqual(release_expired(), 1)
+
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.reserved_stock, 0)
+        self.assertFalse(StockReservation.objects.exists())
+
+    def test_checkout_replays_duplicate_submission(self):
+        CartItem.objects.create(cart=self.cart, product=self.product, quantity=1)
+        self.client.force_login(self.user)
+        data = {'selected_address': self.address.pk, 'idempotency_key': 'checkout-1'}
+
+        first = self.client.post(reverse('orders:checkout'), data)
+        second = self.client.post(reverse('orders:checkout'), data)
+
+        self.assertEqual(Order.objects.count(), 1)
+        self.assertEqual(second['Idempotent-Replayed'], 'true')
+        self.assertEqual(second['Location'], first['Location'])
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.stock, 4)
+
+    def test_checkout_rejects_in_progress_and_mismatched_keys(self):
+        CartItem.objects.create(cart=self.cart, product=self.product, quantity=1)
+        self.client.force_login(self.user)
+        data = {'selected_address': self.address.pk, 'idempotency_key': 'checkout-1'}
+        self.client.post(reverse('orders:checkout'), data)
+        IdempotencyKey.objects.update(status_code=None)
+
+        self.assertEqual(self.client.post(reverse('orders:checkout'), data).status_code, 409)
+        data['selected_address'] = 'new'
+        self.assertEqual(self.client.post(reverse('orders:checkout'), data).status_code, 422)
+        self.assertEqual(Order.objects.count(), 1)
+
+
+class JobQueueTests(TestCase):
+    def setUp(self):
+        self.calls = []
+        task('tests.record')(lambda **payload: self.calls.append(payload))
+        self.addCleanup(_handlers.pop, 'tests.record')
+
+        def fail(**payload):
+            raise ValueError('boom')
+        task('tests.fail')(fail)
+        self.addCleanup(_handlers.pop, 'tests.fail')
+
+    def test_claims_due_jobs_once_and_deletes_them_on_success(self):
+        first = enqueue('tests.record', {'n': 1})
+        second = enqueue('tests.record', {'n': 2})
+        enqueue('tests.record', {'n': 3}, delay=timedelta(hours=1))
+
+        jobs = claim()
+        self.assertEqual([job.pk for job in jobs], [first.pk, second.pk])
+        self.assertEqual({(job.status, job.attempts) for job in jobs}, {(JobStatus.RUNNING, 1)})
+        self.assertEqual(claim(), [])
+
+        for job in jobs:
+            self.assertTrue(run_job(job))
+        self.assertEqual(self.calls, [{'n': 1}, {'n': 2}])
+        self.assertEqual(Job.objects.count(), 1)
+
+    def test_failures_back_off_then_fail_permanently(self):
+        job = enqueue('tests.fail', max_attempts=2)
+
+        self.assertFalse(run_job(claim()[0]))
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts, job.claimed_by), (JobStatus.QUEUED, 1, ''))
+        self.assertGreater(job.run_at, timezone.now())
+        self.assertIn('boom', job.last_error)
+
+        Job.objects.update(run_at=timezone.now())
+        self.assertFalse(run_job(claim()[0]))
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), (JobStatus.FAILED, 2))
+
+    def test_claim_skips_jobs_taken_by_another_worker(self):
+        taken = enqueue('tests.record')
+        free = enqueue('tests.record')
+        Job.objects.filter(pk=taken.pk).update(status=JobStatus.RUNNING, claimed_by='other-worker')
+
+        # A stale read still lists the taken job; the status guard on the
+        # claiming UPDATE must leave it to its owner.
+        with mock.patch('orders.jobs._ready_jobs', return_value=Job.objects.order_by('id')):
+            jobs = claim()
+
+        self.assertEqual([job.pk for job in jobs], [free.pk])
+        self.assertEqual(Job.objects.get(pk=taken.pk).claimed_by, 'other-worker')
+
+    def test_stale_claims_are_requeued(self):
+        job = enqueue('tests.record')
+        claim()
+        Job.objects.update(claimed_at=timezone.now() - timedelta(hours=1))
+
+        self.assertEqual(requeue_stale(), 1)
+        self.assertEqual([claimed.pk for claimed in claim()], [job.pk])
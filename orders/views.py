@@ -1,27 +1,41 @@
 import logging
+import uuid
 
 from django.shortcuts import render
 from users.models import Address
-from users.models import CartItem
-from django.db.models import Sum, F, Subquery, OuterRef
+from users.cart import reconcile_cart
+from django.db.models import F, Subquery, OuterRef
 from django.contrib import messages
 from django.shortcuts import redirect
 from django.db import transaction
 from django.contrib.auth.decorators import login_required
 
-from orders.models import Order, OrderItem
+from orders.checkout import CheckoutError, place_order
+from orders.idempotency import idempotent
+from orders.jobs import enqueue
+from orders.archive import find_order, order_history
+from orders.reservations import ReservationError, reserve_cart
 from shop.models import ProductRating
+from shop.pagination import MergedKeysetPaginator
 
 logger = logging.getLogger('orders')
 
 
 @login_required(login_url='users:login')
+@idempotent
 def checkout_view(request):
     logger.info(f"Checkout page accessed by user: {request.user.email}")
-    cart_items = CartItem.objects.filter(cart__user=request.user).annotate(subtotal=F('quantity') * F('product__price'))
-    total = cart_items.aggregate(total=Sum(F('subtotal')))['total']
+    summary = reconcile_cart(request.user)
+    cart_items, total = summary.items, summary.total
 
     if request.method == 'POST':
+        if summary.clamped or summary.removed:
+            logger.warning(f"Checkout blocked by cart changes: clamped={len(summary.clamped)}, removed={summary.removed}, user={request.user.email}")
+            messages.error(request, 'Your cart was updated to match available stock. Please review it before placing the order.')
+            return redirect('users:cart')
+        if not cart_items:
+            messages.error(request, 'Your cart is empty.')
+            return redirect('users:cart')
         with transaction.atomic():
             address_id = request.POST.get('selected_address')
             address = None
@@ -52,71 +66,66 @@ def checkout_view(request):
                 address.save()
                 logger.info(f"Address set as default: address_id={address.id}, user={request.user.email}")
             
-            order = Order.objects.create(user=request.user, address=address, total_amount=total)
-            logger.info(f"Order created: order_id={order.id}, total_amount={total}, user={request.user.email}")
+            try:
+                order = place_order(request.user, address, cart_items)
+            except CheckoutError as e:
+                logger.error(f"Error placing order: error={str(e)}, user={request.user.email}")
+                messages.error(request, f'Error placing order: {e}')
+                return redirect('users:cart')
 
-            for cart_item in cart_items:
-                try:
-                    if cart_item.product.stock < cart_item.quantity:
-                        cart_item.quantity = cart_item.product.stock
-                        cart_item.save()
-                        raise Exception(f'Sorry, only {cart_item.product.stock} {cart_item.product.name}(s) left in stock.')
-                    
-                    if not cart_item.product.is_active or cart_item.product.is_deleted:
-                        raise Exception(f'Product {cart_item.product.name} is no longer available.')
-                    
-                    OrderItem.objects.create(order=order, product=cart_item.product, quantity=cart_item.quantity, price=cart_item.product.price)
-
-                    cart_item.product.stock -= cart_item.quantity
-                    cart_item.product.save()
-                    
-                    logger.info(f"Order item created: order_id={order.id}, product_id={cart_item.product.id}, quantity={cart_item.quantity}, user={request.user.email}")
-                    cart_item.delete()
-                except Exception as e:
-                    logger.error(f"Error placing order: order_id={order.id}, error={str(e)}, user={request.user.email}")
-                    messages.error(request, f'Error placing order: {e}')
-                    return redirect('users:cart')
-            
+            enqueue('orders.send_order_confirmation', {'order_id': order.id})
             logger.info(f"Order placed successfully: order_id={order.id}, user={request.user.email}")
             messages.success(request, 'Order placed successfully.')
             return redirect('orders:order_detail', order_id=order.id)
     
+    reserved_until = None
+    if cart_items:
+        try:
+            reserved_until = reserve_cart(request.user, cart_items)
+        except ReservationError as e:
+            logger.warning(f"Stock reservation failed: error={str(e)}, user={request.user.email}")
+            messages.error(request, str(e))
+            return redirect('users:cart')
+
     addresses = Address.objects.filter(user=request.user)
     context = {
         'addresses': addresses,
         'cart_items': cart_items,
-        'total': total
+        'total': total,
+        'reserved_until': reserved_until,
+        'idempotency_key': uuid.uuid4().hex
     }
     return render(request, 'orders/checkout.html', context)
 
 
 @login_required(login_url='users:login')
 def orders_view(request):
-    orders = Order.objects.filter(user=request.user).select_related('address').prefetch_related(
-        'order_items', 'order_items__product').order_by('-created_at')
-    logger.info(f"Orders list viewed: user={request.user.email}, count={orders.count()}")
+    fields = ('id', 'status', 'total_amount', 'item_count', 'first_item_name', 'first_item_image', 'created_at')
+    orders = [queryset.only(*fields) for queryset in order_history(request.user)]
+    page = MergedKeysetPaginator(orders, ('-created_at', '-id')).get_page(request.GET.get('cursor'))
+    logger.info(f"Orders list viewed: user={request.user.email}, page_count={len(page)}")
     context = {
-        'orders': orders
+        'orders': page,
+        'page': page,
     }
     return render(request, 'orders/orders.html', context)
 
 
 @login_required(login_url='users:login')
 def order_detail_view(request, order_id):
-    try:
-        order = Order.objects.get(id=order_id)
-        logger.info(f"Order detail viewed: order_id={order_id}, user={request.user.email}")
-    except Order.DoesNotExist:
+    order = find_order(order_id, user=request.user)
+    if order is None:
         logger.error(f"Order not found: order_id={order_id}, user={request.user.email}")
         messages.error(request, 'Order not found')
         return redirect('orders:orders')
+    logger.info(f"Order detail viewed: order_id={order_id}, archived={getattr(order, 'is_archived', False)}, user={request.user.email}")
     user_rating_subquery = Subquery(
         ProductRating.objects.filter(
             product=OuterRef('product'),
             user=request.user
         ).values('rating')[:1]
     )
-    order_items = OrderItem.objects.filter(order=order).prefetch_related(
+    order_items = order.order_items.prefetch_related(
         'product', 'product__ratings').order_by('product__name').annotate(
                 subtotal=F('quantity') * F('product__price'),
                 user_rating=user_rating_subquery
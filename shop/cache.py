@@ -0,0 +1,69 @@
+import uuid
+
+from django.core.cache import cache
+from django.template.loader import render_to_string
+from django.utils.safestring import mark_safe
+
+CATALOG_TAG = 'catalog'
+CACHE_TIMEOUT = 600
+PRODUCT_CARD_TEMPLATE = 'includes/product_card.html'
+
+
+def product_tag(product_id):
+    return f'product:{product_id}'
+
+
+def _tag_key(tag):
+    return f'shop:tag:{tag}'
+
+
+def _new_version():
+    return uuid.uuid4().hex[:12]
+
+
+def tag_versions(tags):
+    keys = {tag: _tag_key(tag) for tag in tags}
+    stored = cache.get_many(keys.values())
+    versions, missing = {}, {}
+    for tag, key in keys.items():
+        if key in stored:
+            versions[tag] = stored[key]
+        else:
+            versions[tag] = missing[key] = _new_version()
+    if missing:
+        cache.set_many(missing, None)
+    return versions
+
+
+def invalidate_tags(*tags):
+    cache.set_many({_tag_key(tag): _new_version() for tag in tags}, None)
+
+
+def tagged_key(name, tags):
+    versions = tag_versions(tags)
+    return f"shop:{name}:{'.'.join(versions[tag] for tag in tags)}"
+
+
+def get_or_build(name, tags, builder, timeout=CACHE_TIMEOUT):
+    key = tagged_key(name, tags)
+    value = cache.get(key)
+    if value is None:
+        value = builder()
+        cache.set(key, value, timeout)
+    return value
+
+
+def render_product_cards(products):
+    products = list(products)
+    versions = tag_versions([product_tag(product.pk) for product in products])
+    keys = {product.pk: f'shop:card:{product.pk}:{versions[product_tag(product.pk)]}' for product in products}
+    cached_cards = cache.get_many(keys.values())
+    cards, missing = [], {}
+    for product in products:
+        card = cached_cards.get(keys[product.pk])
+        if card is None:
+            card = missing[keys[product.pk]] = render_to_string(PRODUCT_CARD_TEMPLATE, {'product': product})
+        cards.append(mark_safe(card))
+    if missing:
+        cache.set_many(missing, CACHE_TIMEOUT)
+    return cards
@@ -0,0 +1,65 @@
+import hashlib
+
+from django.contrib import messages
+from django.db.models import Count, Max
+
+from orders.recommendations import latest_build
+from shop.models import Product
+
+
+def make_etag(*parts):
+    return hashlib.md5('|'.join(str(part) for part in parts).encode()).hexdigest()
+
+
+def _catalog_state(request):
+    # A hard delete leaves Max('updated_at') alone but lowers the row count.
+    if not hasattr(request, '_catalog_state'):
+        request._catalog_state = Product.objects.aggregate(last_modified=Max('updated_at'), count=Count('id'))
+    return request._catalog_state
+
+
+def _recommendation_build(request):
+    if not hasattr(request, '_recommendation_build'):
+        request._recommendation_build = latest_build()
+    return request._recommendation_build
+
+
+def _product_last_modified(request, product_id):
+    # The detail page also shows recommendations, so a newer build counts as a change.
+    if not hasattr(request, '_product_last_modified'):
+        updated_at, request._product_reserved_stock = Product.objects.filter(
+            pk=product_id, is_active=True, is_deleted=False
+        ).values_list('updated_at', 'reserved_stock').first() or (None, None)
+        build = _recommendation_build(request)
+        if updated_at is not None and build is not None:
+            updated_at = max(updated_at, build['created_at'])
+        request._product_last_modified = updated_at
+    return request._product_last_modified
+
+
+# Both pages are validated by ETag only: their ETags cover state that no
+# timestamp reflects (deletions, the viewer, stock holds), so an
+# If-Modified-Since check alone would answer stale 304s.
+def catalog_etag(request, *args, **kwargs):
+    state = _catalog_state(request)
+    if state['last_modified'] is None:
+        return None
+    return make_etag(
+        state['last_modified'].isoformat(), state['count'], request.get_full_path(), request.META.get('HTTP_ACCEPT', '')
+    )
+
+
+def product_etag(request, product_id):
+    # Pending flash messages are rendered into the page, so it must not be
+    # answered with a 304 while any are queued.
+    if len(messages.get_messages(request)):
+        return None
+    last_modified = _product_last_modified(request, product_id)
+    if last_modified is None:
+        return None
+    user_id = request.user.pk if request.user.is_authenticated else None
+    build = _recommendation_build(request)
+    # Checkout holds change the shown availability without touching updated_at.
+    return make_etag(
+        product_id, last_modified.isoformat(), user_id, build['id'] if build else None, request._product_reserved_stock
+    )
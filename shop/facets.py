@@ -0,0 +1,196 @@
+import threading
+import time
+from bisect import bisect_right
+from decimal import Decimal
+
+from django.db import connection
+
+from shop.models import Product
+
+FACET_INDEX_TTL = 300
+PRICE_BOUNDARIES = [Decimal('500'), Decimal('1000'), Decimal('2500'), Decimal('5000')]
+RATING_THRESHOLDS = [5, 4, 3, 2, 1]
+
+
+def _price_bucket_keys():
+    keys, lower = [], Decimal('0')
+    for upper in PRICE_BOUNDARIES:
+        keys.append(f'{lower:.0f}-{upper:.0f}')
+        lower = upper
+    keys.append(f'{lower:.0f}-')
+    return keys
+
+
+PRICE_BUCKETS = _price_bucket_keys()
+
+
+def price_bucket_range(key):
+    index = PRICE_BUCKETS.index(key)
+    lower = PRICE_BOUNDARIES[index - 1] if index else None
+    upper = PRICE_BOUNDARIES[index] if index < len(PRICE_BOUNDARIES) else None
+    return lower, upper
+
+
+def _price_bucket(price):
+    return bisect_right(PRICE_BOUNDARIES, Decimal(str(price)))
+
+
+def price_range_buckets(min_price=None, max_price=None):
+    # Custom ranges are snapped outwards to whole buckets so they can be served
+    # from the precomputed bitsets.
+    first = _price_bucket(min_price) if min_price is not None else 0
+    last = _price_bucket(max_price) if max_price is not None else len(PRICE_BUCKETS) - 1
+    return range(first, last + 1)
+
+
+def bitset_from_ids(ids):
+    # Bits are set in a bytearray and converted once; OR-ing ``1 << pk`` into
+    # a growing int would copy the whole bitset for every id.
+    ids = list(ids)
+    if not ids:
+        return 0
+    bits = bytearray(max(ids) // 8 + 1)
+    for pk in ids:
+        bits[pk >> 3] |= 1 << (pk & 7)
+    return int.from_bytes(bits, 'little')
+
+
+class FacetIndex:
+    # Each facet value maps to a bitset (a Python int) of product ids, so
+    # intersections are a single ``&`` and counts a single ``bit_count()``.
+    # Once loaded, a stale index keeps serving while a background thread
+    # rebuilds it; only the very first load happens on the request path.
+    def __init__(self, ttl=FACET_INDEX_TTL):
+        self.ttl = ttl
+        self._lock = threading.RLock()
+        self._loaded_at = None
+        self._ready = False
+        self._building = False
+        self._pending = []
+        self._products = {}
+        self._price_bits = [0] * len(PRICE_BUCKETS)
+        self._rating_bits = {threshold: 0 for threshold in RATING_THRESHOLDS}
+
+    def invalidate(self):
+        self._loaded_at = None
+
+    def reload(self):
+        with self._lock:
+            self._building = True
+        self._rebuild()
+
+    def _is_stale(self):
+        return self._loaded_at is None or time.monotonic() - self._loaded_at > self.ttl
+
+    def _add(self, pk, price, rating_avg):
+        bit = 1 << pk
+        bucket = _price_bucket(price)
+        self._price_bits[bucket] |= bit
+        thresholds = [threshold for threshold in RATING_THRESHOLDS if rating_avg >= threshold]
+        for threshold in thresholds:
+            self._rating_bits[threshold] |= bit
+        self._products[pk] = (bucket, thresholds)
+
+    def _discard(self, pk):
+        entry = self._products.pop(pk, None)
+        if entry is None:
+            return
+        mask = ~(1 << pk)
+        bucket, thresholds = entry
+        self._price_bits[bucket] &= mask
+        for threshold in thresholds:
+            self._rating_bits[threshold] &= mask
+
+    def _build(self):
+        products = {}
+        price_ids = [[] for _ in PRICE_BUCKETS]
+        rating_ids = {threshold: [] for threshold in RATING_THRESHOLDS}
+        rows = Product.objects.filter(is_active=True, is_deleted=False).order_by().values_list('id', 'price', 'rating_avg')
+        for pk, price, rating_avg in rows.iterator(chunk_size=10000):
+            bucket = _price_bucket(price)
+            thresholds = [threshold for threshold in RATING_THRESHOLDS if rating_avg >= threshold]
+            price_ids[bucket].append(pk)
+            for threshold in thresholds:
+                rating_ids[threshold].append(pk)
+            products[pk] = (bucket, thresholds)
+        price_bits = [bitset_from_ids(ids) for ids in price_ids]
+        rating_bits = {threshold: bitset_from_ids(ids) for threshold, ids in rating_ids.items()}
+        return products, price_bits, rating_bits
+
+    def _rebuild(self):
+        try:
+            products, price_bits, rating_bits = self._build()
+            with self._lock:
+                self._products, self._price_bits, self._rating_bits = products, price_bits, rating_bits
+                # Writes that landed while the snapshot was being read are replayed on top of it.
+                for pk, price, rating_avg, eligible in self._pending:
+                    self._discard(pk)
+                    if eligible:
+                        self._add(pk, price, rating_avg)
+                self._loaded_at = time.monotonic()
+                self._ready = True
+        finally:
+            with self._lock:
+                self._building = False
+                self._pending = []
+
+    def _rebuild_in_background(self):
+        try:
+            self._rebuild()
+        finally:
+            connection.close()
+
+    def _ensure_loaded(self):
+        with self._lock:
+            if not self._is_stale() or self._building:
+                return
+            self._building = True
+            background = self._ready
+        if background:
+            threading.Thread(target=self._rebuild_in_background, name='facet-index-rebuild', daemon=True).start()
+        else:
+            self._rebuild()
+
+    def update_product(self, pk, price, rating_avg, eligible):
+        with self._lock:
+            if self._building:
+                self._pending.append((pk, price, rating_avg, eligible))
+            if not self._ready:
+                return
+            self._discard(pk)
+            if eligible:
+                self._add(pk, price, rating_avg)
+
+    def refresh_product(self, pk):
+        if not self._ready and not self._building:
+            return
+        row = Product.objects.filter(pk=pk).values_list('price', 'rating_avg', 'is_active', 'is_deleted').first()
+        if row is None:
+            self.remove_product(pk)
+            return
+        price, rating_avg, is_active, is_deleted = row
+        self.update_product(pk, price, rating_avg, is_active and not is_deleted)
+
+    def remove_product(self, pk):
+        self.update_product(pk, None, None, False)
+
+    def counts(self, price_bucket=None, min_rating=None, restrict_to=None, min_price=None, max_price=None):
+        self._ensure_loaded()
+        with self._lock:
+            price_bits = list(self._price_bits)
+            rating_bits = dict(self._rating_bits)
+        universe = -1 if restrict_to is None else restrict_to
+        if min_price is not None or max_price is not None:
+            price_range = 0
+            for bucket in price_range_buckets(min_price, max_price):
+                price_range |= price_bits[bucket]
+            universe &= price_range
+        price_filter = price_bits[PRICE_BUCKETS.index(price_bucket)] if price_bucket in PRICE_BUCKETS else -1
+        rating_filter = rating_bits.get(min_rating, -1)
+        return {
+            'price': [(key, (bits & rating_filter & universe).bit_count()) for key, bits in zip(PRICE_BUCKETS, price_bits)],
+            'rating': [(threshold, (rating_bits[threshold] & price_filter & universe).bit_count()) for threshold in RATING_THRESHOLDS],
+        }
+
+
+facet_index = FacetIndex()
@@ -0,0 +1,73 @@
+import hashlib
+import io
+import logging
+
+from django.core.files.base import ContentFile
+from django.utils import timezone
+from PIL import Image, ImageOps
+
+from orders.jobs import enqueue
+from shop.cache import CATALOG_TAG, invalidate_tags, product_tag
+from shop.models import IMAGE_VARIANT_WIDTHS, Product
+
+logger = logging.getLogger('shop')
+
+VARIANT_DIR = 'products/variants'
+IMAGE_FORMATS = {
+    'webp': ('WEBP', {'quality': 80, 'method': 4}),
+    'jpeg': ('JPEG', {'quality': 82, 'optimize': True, 'progressive': True}),
+}
+
+def _encode(image, fmt):
+    pil_format, options = IMAGE_FORMATS[fmt]
+    if fmt == 'jpeg' and image.mode != 'RGB':
+        if image.mode in ('RGBA', 'LA', 'P'):
+            image = image.convert('RGBA')
+            background = Image.new('RGB', image.size, (255, 255, 255))
+            background.paste(image, mask=image.getchannel('A'))
+            image = background
+        else:
+            image = image.convert('RGB')
+    buffer = io.BytesIO()
+    image.save(buffer, pil_format, **options)
+    return buffer.getvalue()
+
+
+def generate_variants(product_id, force=False):
+    product = Product.objects.filter(pk=product_id).only('id', 'image', 'image_variants').first()
+    if product is None or not product.image:
+        return None
+    if product.has_image_variants and not force:
+        return product.image_variants
+
+    storage = product.image.storage
+    with product.image.open('rb') as source:
+        data = source.read()
+    digest = hashlib.sha256(data).hexdigest()[:16]
+    variants = {'source': product.image.name, 'hash': digest}
+
+    with Image.open(io.BytesIO(data)) as original:
+        original = ImageOps.exif_transpose(original)
+        if original.mode not in ('RGB', 'RGBA'):
+            original = original.convert('RGBA' if 'A' in original.getbands() or original.mode == 'P' else 'RGB')
+        for name, width in IMAGE_VARIANT_WIDTHS.items():
+            resized = original.copy()
+            resized.thumbnail((width, width), Image.Resampling.LANCZOS)
+            variants[name] = {}
+            for fmt in IMAGE_FORMATS:
+                path = f'{VARIANT_DIR}/{digest}/{name}.{"jpg" if fmt == "jpeg" else fmt}'
+                if not storage.exists(path):
+                    storage.save(path, ContentFile(_encode(resized, fmt)))
+                variants[name][fmt] = path
+
+    updated = Product.objects.filter(pk=product_id, image=product.image.name).update(image_variants=variants, updated_at=timezone.now())
+    if updated:
+        # Index sections cache Product instances under the catalog tag; their
+        # cards must not be re-rendered from a copy without the new variants.
+        invalidate_tags(product_tag(product_id), CATALOG_TAG)
+        logger.info(f"Image variants generated: product_id={product_id}, hash={digest}")
+    return variants
+
+
+def schedule_variants(product_id):
+    enqueue('shop.generate_image_variants', {'product_id': product_id})
@@ -0,0 +1,31 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from shop.images import generate_variants
+from shop.models import Product
+
+
+class Command(BaseCommand):
+    help = 'Generate thumbnail, medium and large WebP/JPEG variants for product images'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--force', action='store_true', help='Regenerate variants that already exist')
+        parser.add_argument('--workers', type=int, default=4)
+
+    def _build(self, product_id, force):
+        try:
+            return generate_variants(product_id, force=force)
+        except Exception as e:
+            self.stderr.write(f'Product {product_id}: {e}')
+        finally:
+            close_old_connections()
+
+    def handle(self, *args, **options):
+        products = Product.objects.exclude(image='').only('id', 'image', 'image_variants').order_by('id')
+        pending = [product.id for product in products.iterator(chunk_size=1000) if options['force'] or not product.has_image_variants]
+        with ThreadPoolExecutor(max_workers=options['workers']) as executor:
+            results = list(executor.map(lambda pk: self._build(pk, options['force']), pending))
+        built = sum(1 for result in results if result)
+        self.stdout.write(self.style.SUCCESS(f'Built image variants for {built} of {len(pending)} products'))
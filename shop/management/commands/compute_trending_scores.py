@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+
+from shop.trending import HALF_LIFE_DAYS, WINDOW_DAYS, compute_trending_scores
+
+
+class Command(BaseCommand):
+    help = 'Recompute stored trending scores from time-decayed sales and rating signals'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--half-life-days', type=float, default=HALF_LIFE_DAYS)
+        parser.add_argument('--window-days', type=int, default=WINDOW_DAYS)
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        updated = compute_trending_scores(
+            half_life_days=options['half_life_days'],
+            window_days=options['window_days'],
+            batch_size=options['batch_size'],
+        )
+        self.stdout.write(self.style.SUCCESS(f'Updated trending scores for {updated} products'))
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from shop.search import fts_enabled, rebuild_index
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the full-text product search index from the product table'
+
+    def handle(self, *args, **options):
+        if not fts_enabled():
+            self.stdout.write(self.style.WARNING('Full-text search index is only available on SQLite; nothing to rebuild'))
+            return
+        indexed = rebuild_index()
+        self.stdout.write(self.style.SUCCESS(f'Indexed {indexed} products'))
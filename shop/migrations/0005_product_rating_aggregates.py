@@ -0,0 +1,68 @@
+# Generated by Django 5.2.8 on 2026-10-17 22:25
+
+from collections import Counter
+
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def backfill_rating_aggregates(apps, schema_editor):
+    Product = apps.get_model('shop', 'Product')
+    ProductRating = apps.get_model('shop', 'ProductRating')
+    histograms = {}
+    rows = ProductRating.objects.order_by().values_list('product_id', 'rating').annotate(total=Count('id'))
+    for product_id, rating, total in rows:
+        histograms.setdefault(product_id, Counter())[rating] += total
+    for product_id, histogram in histograms.items():
+        count = sum(histogram.values())
+        Product.objects.filter(pk=product_id).update(
+            rating_count=count,
+            rating_avg=sum(star * total for star, total in histogram.items()) / count,
+            **{f'rating_{star}_count': histogram[star] for star in range(1, 6)},
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('shop', '0004_product_is_active_product_is_deleted'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='rating_1_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='rating_2_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='rating_3_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='rating_4_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='rating_5_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='rating_avg',
+            field=models.FloatField(db_index=True, default=0),
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='rating_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(backfill_rating_aggregates, migrations.RunPython.noop),
+    ]
@@ -4,21 +4,74 @@ from django.core.validators import MinValueValidator, MaxValueValidator
 
 User = get_user_model()
 
+IMAGE_VARIANT_WIDTHS = {'thumb': 320, 'medium': 640, 'large': 1280}
+
 
 class Product(models.Model):
     name = models.CharField(max_length=255)
     description = models.TextField()
     price = models.DecimalField(max_digits=10, decimal_places=2)
     image = models.ImageField(upload_to='products/')
+    image_variants = models.JSONField(default=dict, blank=True)
     stock = models.IntegerField()
+    reserved_stock = models.PositiveIntegerField(default=0)
     is_active = models.BooleanField(default=True)
     is_deleted = models.BooleanField(default=False)
+    rating_avg = models.FloatField(default=0, db_index=True)
+    rating_count = models.PositiveIntegerField(default=0)
+    rating_1_count = models.PositiveIntegerField(default=0)
+    rating_2_count = models.PositiveIntegerField(default=0)
+    rating_3_count = models.PositiveIntegerField(default=0)
+    rating_4_count = models.PositiveIntegerField(default=0)
+    rating_5_count = models.PositiveIntegerField(default=0)
+    trending_score = models.FloatField(default=0, db_index=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
     def __str__(self):
         return self.name
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['created_at', 'id'], name='product_created_keyset_idx'),
+            models.Index(fields=['price', 'id'], name='product_price_keyset_idx'),
+            models.Index(fields=['updated_at', 'id'], name='product_updated_keyset_idx'),
+        ]
+
+    @property
+    def has_image_variants(self):
+        return bool(self.image) and self.image_variants.get('source') == self.image.name
+
+    @property
+    def image_urls(self):
+        if not self.image:
+            return {}
+        if not self.has_image_variants:
+            return {name: {'webp': None, 'jpeg': self.image.url} for name in IMAGE_VARIANT_WIDTHS}
+        storage = self.image.storage
+        return {
+            name: {fmt: storage.url(path) for fmt, path in self.image_variants[name].items()}
+            for name in IMAGE_VARIANT_WIDTHS
+        }
+
+    @property
+    def image_srcset(self):
+        if not self.has_image_variants:
+            return {}
+        urls = self.image_urls
+        return {
+            fmt: ', '.join(f'{urls[name][fmt]} {width}w' for name, width in IMAGE_VARIANT_WIDTHS.items())
+            for fmt in ('webp', 'jpeg')
+        }
+
+    @property
+    def available_stock(self):
+        return max(self.stock - self.reserved_stock, 0)
+
+    @property
+    def rating_histogram(self):
+        return [(star, getattr(self, f'rating_{star}_count')) for star in range(5, 0, -1)]
+
     
 class ProductRating(models.Model):
     product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='ratings')
@@ -0,0 +1,173 @@
+import base64
+import binascii
+import json
+from datetime import date, datetime
+from decimal import Decimal
+
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.db.models import Q
+
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+
+
+class InvalidCursor(Exception):
+    pass
+
+
+def _dump_value(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return str(value)
+    return value
+
+
+def encode_cursor(values, direction='next'):
+    payload = json.dumps({'v': [_dump_value(value) for value in values], 'd': direction}, separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+
+def decode_cursor(token):
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(token + '=' * (-len(token) % 4)))
+        values, direction = payload['v'], payload['d']
+    except (binascii.Error, ValueError, TypeError, KeyError):
+        raise InvalidCursor(f'Invalid cursor: {token!r}')
+    if direction not in ('next', 'previous') or not isinstance(values, list):
+        raise InvalidCursor(f'Invalid cursor: {token!r}')
+    return values, direction
+
+
+class CursorPage:
+    def __init__(self, object_list, next_cursor=None, previous_cursor=None):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+    @property
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+
+class KeysetPaginator:
+    # ``ordering`` must end with a unique column (normally ``id``) so every row has a distinct key.
+    def __init__(self, queryset, ordering=('-created_at', '-id'), page_size=DEFAULT_PAGE_SIZE):
+        self.queryset = queryset
+        self.ordering = tuple(ordering)
+        self.page_size = page_size
+        self.fields = [name.lstrip('-') for name in self.ordering]
+
+    def _output_field(self, name):
+        annotation = self.queryset.query.annotations.get(name)
+        if annotation is not None:
+            return annotation.output_field
+        try:
+            return self.queryset.model._meta.get_field(name)
+        except FieldDoesNotExist:
+            raise InvalidCursor(f'Cannot paginate on unknown field: {name}')
+
+    def _parse_values(self, values):
+        if len(values) != len(self.fields):
+            raise InvalidCursor('Cursor does not match the requested ordering')
+        try:
+            return [self._output_field(name).to_python(value) for name, value in zip(self.fields, values)]
+        except ValidationError:
+            raise InvalidCursor('Cursor contains invalid values')
+
+    def _key(self, obj):
+        if isinstance(obj, dict):
+            return [obj[name] for name in self.fields]
+        return [getattr(obj, name) for name in self.fields]
+
+    def _rows(self, queryset, ordering, values):
+        queryset = queryset.order_by(*ordering)
+        if values is not None:
+            queryset = queryset.filter(self._seek(ordering, values))
+        return list(queryset[:self.page_size + 1])
+
+    def _seek(self, ordering, values):
+        condition = Q()
+        for position, name in enumerate(ordering):
+            field = name.lstrip('-')
+            lookup = 'lt' if name.startswith('-') else 'gt'
+            step = Q(**{f'{field}__{lookup}': values[position]})
+            for previous, value in zip(self.fields[:position], values):
+                step &= Q(**{previous: value})
+            condition |= step
+        return condition
+
+    def page(self, cursor=None):
+        values, direction = None, 'next'
+        if cursor:
+            raw_values, direction = decode_cursor(cursor)
+            values = self._parse_values(raw_values)
+
+        ordering = self.ordering
+        if direction == 'previous':
+            ordering = tuple(name[1:] if name.startswith('-') else f'-{name}' for name in self.ordering)
+
+        rows = self._rows(self.queryset, ordering, values)
+        has_more = len(rows) > self.page_size
+        rows = rows[:self.page_size]
+
+        if direction == 'previous':
+            rows.reverse()
+            has_next, has_previous = True, has_more
+        else:
+            has_next, has_previous = has_more, values is not None
+
+        if not rows:
+            previous_cursor = encode_cursor(values, 'previous') if values is not None and direction == 'next' else None
+            return CursorPage(rows, previous_cursor=previous_cursor)
+        return CursorPage(
+            rows,
+            next_cursor=encode_cursor(self._key(rows[-1]), 'next') if has_next else None,
+            previous_cursor=encode_cursor(self._key(rows[0]), 'previous') if has_previous else None,
+        )
+
+    def get_page(self, cursor=None):
+        try:
+            return self.page(cursor)
+        except InvalidCursor:
+            return self.page(None)
+
+
+class MergedKeysetPaginator(KeysetPaginator):
+    # Pages across several querysets sharing the ordering columns, e.g. hot and
+    # archived rows. Each source is seeked independently and at most
+    # ``page_size + 1`` rows are read from every one of them before merging,
+    # so keys must be unique across all sources.
+    def __init__(self, querysets, ordering=('-created_at', '-id'), page_size=DEFAULT_PAGE_SIZE):
+        self.querysets = list(querysets)
+        super().__init__(self.querysets[0], ordering, page_size)
+
+    def _rows(self, queryset, ordering, values):
+        rows = []
+        for source in self.querysets:
+            rows.extend(super()._rows(source, ordering, values))
+        for name in reversed(ordering):
+            field = name.lstrip('-')
+            rows.sort(key=lambda row: row[field] if isinstance(row, dict) else getattr(row, field), reverse=name.startswith('-'))
+        return rows[:self.page_size + 1]
+
+
+def get_page_size(value, default=DEFAULT_PAGE_SIZE, maximum=MAX_PAGE_SIZE):
+    try:
+        size = int(value)
+    except (TypeError, ValueError):
+        return default
+    return max(1, min(size, maximum))
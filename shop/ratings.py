@@ -0,0 +1,70 @@
+from collections import Counter
+
+from django.db import transaction
+from django.db.models import Case, Count, F, FloatField, Value, When
+from django.db.models.functions import Cast
+from django.utils import timezone
+
+from shop.models import Product, ProductRating
+
+HISTOGRAM_FIELDS = {star: f'rating_{star}_count' for star in range(1, 6)}
+
+
+def _histogram_field(rating):
+    try:
+        return HISTOGRAM_FIELDS[int(rating)]
+    except (KeyError, TypeError, ValueError):
+        raise ValueError(f'Rating must be between 1 and 5, got {rating!r}')
+
+
+def _average_expression():
+    weighted = sum((F(field) * star for star, field in HISTOGRAM_FIELDS.items()), Value(0))
+    return Case(
+        When(rating_count=0, then=Value(0.0)),
+        default=Cast(weighted, FloatField()) / F('rating_count'),
+        output_field=FloatField(),
+    )
+
+
+def apply_rating_change(product_id, old_rating=None, new_rating=None):
+    deltas = Counter()
+    if old_rating is not None:
+        deltas[_histogram_field(old_rating)] -= 1
+        deltas['rating_count'] -= 1
+    if new_rating is not None:
+        deltas[_histogram_field(new_rating)] += 1
+        deltas['rating_count'] += 1
+    updates = {field: F(field) + delta for field, delta in deltas.items() if delta}
+    if not updates:
+        return
+    with transaction.atomic():
+        Product.objects.filter(pk=product_id).update(**updates)
+        Product.objects.filter(pk=product_id).update(rating_avg=_average_expression(), updated_at=timezone.now())
+
+
+def rebuild_rating_aggregates(batch_size=1000):
+    histograms = {}
+    rows = ProductRating.objects.order_by().values_list('product_id', 'rating').annotate(total=Count('id'))
+    for product_id, rating, total in rows:
+        histograms.setdefault(product_id, Counter())[rating] += total
+
+    fields = ['rating_avg', 'rating_count', *HISTOGRAM_FIELDS.values()]
+    updated = 0
+    products = Product.objects.only('id').order_by('id').iterator(chunk_size=batch_size)
+    batch = []
+    for product in products:
+        histogram = histograms.get(product.id, Counter())
+        count = sum(histogram.values())
+        for star, field in HISTOGRAM_FIELDS.items():
+            setattr(product, field, histogram[star])
+        product.rating_count = count
+        product.rating_avg = sum(star * total for star, total in histogram.items()) / count if count else 0
+        batch.append(product)
+        if len(batch) >= batch_size:
+            Product.objects.bulk_update(batch, fields)
+            updated += len(batch)
+            batch = []
+    if batch:
+        Product.objects.bulk_update(batch, fields)
+        updated += len(batch)
+    return updated
@@ -0,0 +1,50 @@
+import random
+import threading
+import time
+from array import array
+
+from shop.models import Product
+
+SAMPLE_POOL_TTL = 300
+
+
+def _eligible_products():
+    return Product.objects.filter(is_active=True, is_deleted=False, stock__gt=0)
+
+
+class ProductSampler:
+    def __init__(self, ttl=SAMPLE_POOL_TTL):
+        self.ttl = ttl
+        self._ids = array('q')
+        self._loaded_at = None
+        self._lock = threading.Lock()
+
+    def invalidate(self):
+        self._loaded_at = None
+
+    def _is_stale(self):
+        return self._loaded_at is None or time.monotonic() - self._loaded_at > self.ttl
+
+    def pool(self):
+        with self._lock:
+            if self._is_stale():
+                ids = _eligible_products().order_by().values_list('id', flat=True)
+                self._ids = array('q', ids.iterator(chunk_size=10000))
+                self._loaded_at = time.monotonic()
+            return self._ids
+
+    def sample_ids(self, k):
+        ids = self.pool()
+        if len(ids) <= k:
+            sampled = list(ids)
+            random.shuffle(sampled)
+            return sampled
+        return [ids[i] for i in random.sample(range(len(ids)), k)]
+
+    def sample(self, k):
+        ids = self.sample_ids(k)
+        products = _eligible_products().in_bulk(ids)
+        return [products[pk] for pk in ids if pk in products]
+
+
+product_sampler = ProductSampler()
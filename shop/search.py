@@ -0,0 +1,89 @@
+import re
+
+from django.db import connection
+from django.db.models import FloatField, IntegerField, Q, Value
+from django.db.models.expressions import RawSQL
+
+from shop.models import Product
+
+FTS_TABLE = 'shop_product_fts'
+MAX_QUERY_TERMS = 8
+NAME_WEIGHT = 10.0
+DESCRIPTION_WEIGHT = 1.0
+
+_TERM_RE = re.compile(r'\w+')
+
+
+def fts_enabled():
+    return connection.vendor == 'sqlite'
+
+
+def build_match_expression(q):
+    terms = _TERM_RE.findall(q.lower())[:MAX_QUERY_TERMS]
+    return ' '.join(f'"{term}"*' for term in terms)
+
+
+def search_products(queryset, q):
+    # Matching and bm25 ranking run inside the product query, so every other
+    # filter and the (search_rank, id) keyset apply to the full result set.
+    if not fts_enabled():
+        return queryset.filter(Q(name__icontains=q) | Q(description__icontains=q)).annotate(
+            search_rank=Value(0, output_field=IntegerField())
+        )
+    expression = build_match_expression(q)
+    if not expression:
+        return queryset.none().annotate(search_rank=Value(0, output_field=IntegerField()))
+    table = queryset.model._meta.db_table
+    ranking = RawSQL(
+        f'SELECT bm25({FTS_TABLE}, {NAME_WEIGHT}, {DESCRIPTION_WEIGHT}) FROM {FTS_TABLE} '
+        f'WHERE {FTS_TABLE}.rowid = {table}.id AND {FTS_TABLE} MATCH %s',
+        [expression],
+        output_field=FloatField(),
+    )
+    matches = RawSQL(f'SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s', [expression])
+    return queryset.filter(pk__in=matches).annotate(search_rank=ranking).order_by('search_rank', 'id')
+
+
+def matching_ids(q):
+    if not fts_enabled():
+        return list(Product.objects.filter(
+            Q(name__icontains=q) | Q(description__icontains=q), is_active=True, is_deleted=False
+        ).values_list('id', flat=True))
+    expression = build_match_expression(q)
+    if not expression:
+        return []
+    with connection.cursor() as cursor:
+        cursor.execute(f'SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s', [expression])
+        return [row[0] for row in cursor.fetchall()]
+
+
+def index_product(product):
+    if not fts_enabled():
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {FTS_TABLE} WHERE rowid = %s', [product.pk])
+        if product.is_active and not product.is_deleted:
+            cursor.execute(
+                f'INSERT INTO {FTS_TABLE}(rowid, name, description) VALUES (%s, %s, %s)',
+                [product.pk, product.name, product.description],
+            )
+
+
+def remove_product(product_id):
+    if not fts_enabled():
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {FTS_TABLE} WHERE rowid = %s', [product_id])
+
+
+def rebuild_index():
+    if not fts_enabled():
+        return 0
+    table = Product._meta.db_table
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {FTS_TABLE}')
+        cursor.execute(
+            f'INSERT INTO {FTS_TABLE}(rowid, name, description) '
+            f'SELECT id, name, description FROM {table} WHERE is_active AND NOT is_deleted'
+        )
+        return cursor.rowcount
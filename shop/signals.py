@@ -0,0 +1,93 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from shop.cache import CATALOG_TAG, invalidate_tags, product_tag
+from shop.facets import facet_index
+from shop.images import schedule_variants
+from shop.models import Product, ProductRating
+from shop.ratings import apply_rating_change
+from shop.sampling import product_sampler
+from shop.search import index_product, remove_product
+
+
+@receiver(pre_save, sender=ProductRating)
+def remember_previous_rating(sender, instance, raw, **kwargs):
+    instance._previous_rating = None
+    if instance.pk and not raw:
+        instance._previous_rating = sender.objects.filter(pk=instance.pk).values_list('product_id', 'rating').first()
+
+
+@receiver(post_save, sender=ProductRating)
+def update_rating_aggregates_on_save(sender, instance, created, raw, **kwargs):
+    if raw:
+        return
+    previous = getattr(instance, '_previous_rating', None)
+    current = (instance.product_id, int(instance.rating))
+    if previous == current:
+        return
+    if previous and previous[0] != current[0]:
+        apply_rating_change(previous[0], old_rating=previous[1])
+        apply_rating_change(current[0], new_rating=current[1])
+    else:
+        apply_rating_change(current[0], old_rating=previous[1] if previous else None, new_rating=current[1])
+
+
+@receiver(post_delete, sender=ProductRating)
+def update_rating_aggregates_on_delete(sender, instance, **kwargs):
+    apply_rating_change(instance.product_id, old_rating=instance.rating)
+
+
+@receiver(post_save, sender=Product)
+def update_search_index_on_save(sender, instance, **kwargs):
+    index_product(instance)
+
+
+@receiver(post_delete, sender=Product)
+def update_search_index_on_delete(sender, instance, **kwargs):
+    remove_product(instance.pk)
+
+
+@receiver(post_save, sender=Product)
+@receiver(post_delete, sender=Product)
+def invalidate_sample_pool(sender, **kwargs):
+    product_sampler.invalidate()
+
+
+@receiver(post_save, sender=Product)
+@receiver(post_delete, sender=Product)
+def invalidate_product_cache(sender, instance, **kwargs):
+    transaction.on_commit(lambda: invalidate_tags(product_tag(instance.pk), CATALOG_TAG))
+
+
+@receiver(post_save, sender=ProductRating)
+@receiver(post_delete, sender=ProductRating)
+def invalidate_rated_product_cache(sender, instance, **kwargs):
+    transaction.on_commit(lambda: invalidate_tags(product_tag(instance.product_id), CATALOG_TAG))
+
+
+@receiver(post_save, sender=Product)
+def update_facet_index_on_save(sender, instance, **kwargs):
+    # The index is shared by the whole process, so it only sees committed rows.
+    pk, price, rating_avg, eligible = instance.pk, instance.price, instance.rating_avg, instance.is_active and not instance.is_deleted
+    transaction.on_commit(lambda: facet_index.update_product(pk, price, rating_avg, eligible))
+
+
+@receiver(post_delete, sender=Product)
+def update_facet_index_on_delete(sender, instance, **kwargs):
+    pk = instance.pk
+    transaction.on_commit(lambda: facet_index.remove_product(pk))
+
+
+@receiver(post_save, sender=ProductRating)
+@receiver(post_delete, sender=ProductRating)
+def update_facet_index_on_rating(sender, instance, **kwargs):
+    product_id = instance.product_id
+    transaction.on_commit(lambda: facet_index.refresh_product(product_id))
+
+
+@receiver(post_save, sender=Product)
+def generate_image_variants(sender, instance, raw, **kwargs):
+    if raw or not instance.image or instance.has_image_variants:
+        return
+    schedule_variants(instance.pk)
@@ -1,3 +1,350 @@
-from django.test import TestCase
+import io
+import shutil
+import tempfile
+from datetime import timedelta
+from decimal import Decimal
+from unittest import mock
 
-# Create your tests here.
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import transaction
+from django.db.models.signals import pre_save
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from PIL import Image
+
+from orders.models import Job, Order, OrderItem, OrderStatus
+from orders.recommendations import build_recommendations
+from shop.facets import FacetIndex, bitset_from_ids, facet_index
+from shop.images import generate_variants
+from shop.models import IMAGE_VARIANT_WIDTHS, Product, ProductRating
+from shop.pagination import KeysetPaginator, encode_cursor
+from shop.sampling import ProductSampler
+from shop.trending import compute_trending_scores, decayed_sales
+from users.models import Address, Cart, CartItem, User
+
+
+class ProductSearchTests(TestCase):
+    def setUp(self):
+        Product.objects.create(name='Blue kettle', description='Steel kettle', price=Decimal('20.00'), stock=5)
+
+    def test_search_without_matches_renders_empty_list(self):
+        for q in ('zzzz', '"'):
+            response = self.client.get(reverse('shop:product_list'), {'q': q})
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(len(response.context['products']), 0)
+
+    def test_search_with_match(self):
+        response = self.client.get(reverse('shop:product_list'), {'q': 'kettle'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([product.name for product in response.context['products']], ['Blue kettle'])
+
+
+class KeysetPaginationTests(TestCase):
+    def setUp(self):
+        self.ids = [
+            Product.objects.create(name=f'Product {i}', description='d', price=Decimal('10.00'), stock=1).pk
+            for i in range(7)
+        ]
+        # Equal created_at values force the id tie-breaker to keep pages disjoint.
+        Product.objects.update(created_at=timezone.now())
+        self.paginator = KeysetPaginator(Product.objects.all(), ('-created_at', '-id'), page_size=3)
+
+    def test_walks_ties_without_gaps_or_repeats(self):
+        seen, cursor = [], None
+        while True:
+            page = self.paginator.page(cursor)
+            seen.extend(product.pk for product in page)
+            if not page.has_next:
+                break
+            cursor = page.next_cursor
+        self.assertEqual(seen, sorted(self.ids, reverse=True))
+
+        previous = self.paginator.page(page.previous_cursor)
+        self.assertEqual([product.pk for product in previous], seen[3:6])
+        self.assertTrue(previous.has_previous)
+
+    def test_invalid_cursor_falls_back_to_first_page(self):
+        first = [product.pk for product in self.paginator.page()]
+        for cursor in ('not-a-cursor', encode_cursor(['x'])):
+            self.assertEqual([product.pk for product in self.paginator.get_page(cursor)], first)
+
+    def test_admin_product_list_pages_by_cursor(self):
+        admin = User.objects.create_user(username='admin@example.com', email='admin@example.com', password='pw', is_staff=True)
+        self.client.force_login(admin)
+        first = self.client.get(reverse('adminpanel:products')).context['page']
+        self.assertEqual([product.pk for product in first], sorted(self.ids, reverse=True))
+        self.assertFalse(first.has_next)
+
+
+class ProductSamplerTests(TestCase):
+    def setUp(self):
+        self.eligible = {
+            Product.objects.create(name=f'Product {i}', description='d', price=Decimal('10.00'), stock=1).pk
+            for i in range(6)
+        }
+        Product.objects.create(name='Sold out', description='d', price=Decimal('10.00'), stock=0)
+        Product.objects.create(name='Hidden', description='d', price=Decimal('10.00'), stock=1, is_active=False)
+        self.sampler = ProductSampler()
+
+    def test_samples_distinct_eligible_products(self):
+        sampled = self.sampler.sample_ids(4)
+        self.assertEqual(len(set(sampled)), 4)
+        self.assertLessEqual(set(sampled), self.eligible)
+        self.assertEqual(set(self.sampler.sample_ids(10)), self.eligible)
+
+    def test_pool_is_reused_until_invalidated(self):
+        self.sampler.pool()
+        with self.assertNumQueries(0):
+            self.sampler.sample_ids(3)
+        self.sampler.invalidate()
+        with self.assertNumQueries(1):
+            self.sampler.sample_ids(3)
+
+    def test_sample_drops_products_that_became_ineligible(self):
+        self.sampler.pool()
+        Product.objects.filter(pk__in=self.eligible).update(stock=0)
+        self.assertEqual(self.sampler.sample(5), [])
+
+
+class TrendingScoreTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='buyer@example.com', email='buyer@example.com', password='pw')
+        self.address = Address.objects.create(
+            user=self.user, address_line_1='1 Main St', city='City', state='State', zip_code='12345', country='IN'
+        )
+        self.fresh, self.week_old, self.stale, self.unsold = [
+            Product.objects.create(name=name, description='d', price=Decimal('10.00'), stock=10)
+            for name in ('Fresh', 'Week old', 'Stale', 'Unsold')
+        ]
+        self.now = timezone.now()
+        self.sell(self.fresh, 4, self.now)
+        self.sell(self.fresh, 9, self.now, status=OrderStatus.CANCELLED)
+        self.sell(self.week_old, 4, self.now - timedelta(days=7))
+        self.sell(self.stale, 40, self.now - timedelta(days=61))
+
+    def sell(self, product, quantity, when, status=OrderStatus.DELIVERED):
+        order = Order.objects.create(user=self.user, address=self.address, status=status, total_amount=product.price * quantity)
+        item = OrderItem.objects.create(order=order, product=product, quantity=quantity, price=product.price)
+        OrderItem.objects.filter(pk=item.pk).update(created_at=when)
+
+    def test_sales_halve_every_half_life(self):
+        sales = decayed_sales(self.now)
+        self.assertAlmostEqual(sales[self.fresh.pk], 4)
+        self.assertAlmostEqual(sales[self.week_old.pk], 2)
+        self.assertNotIn(self.stale.pk, sales)
+
+    def test_scores_rank_the_homepage_trending_section(self):
+        cache.clear()
+        self.assertEqual(compute_trending_scores(), 2)
+        self.assertEqual(compute_trending_scores(), 0)
+
+        ranked = list(Product.objects.order_by('-trending_score', '-id').values_list('name', flat=True))
+        self.assertEqual(ranked[:2], ['Fresh', 'Week old'])
+        trending = self.client.get(reverse('shop:index')).context['trending_items']
+        self.assertIn(reverse('shop:product_detail', args=[self.fresh.pk]), trending[0])
+
+
+class FacetIndexTests(TestCase):
+    def setUp(self):
+        self.cheap = Product.objects.create(name='Cheap', description='d', price=Decimal('100.00'), stock=1, rating_avg=4.5)
+        self.mid = Product.objects.create(name='Mid', description='d', price=Decimal('700.00'), stock=1, rating_avg=3.2)
+        self.dear = Product.objects.create(name='Dear', description='d', price=Decimal('6000.00'), stock=1)
+
+    def test_bitset_from_ids(self):
+        self.assertEqual(bitset_from_ids([]), 0)
+        self.assertEqual(bitset_from_ids([0, 3, 9]), (1 << 0) | (1 << 3) | (1 << 9))
+
+    def test_counts_and_incremental_updates(self):
+        index = FacetIndex()
+        counts = index.counts()
+        self.assertEqual(dict(counts['price']), {'0-500': 1, '500-1000': 1, '1000-2500': 0, '2500-5000': 0, '5000-': 1})
+        self.assertEqual(dict(counts['rating'])[3], 2)
+        index.update_product(self.mid.pk, Decimal('200.00'), 3.2, True)
+        index.remove_product(self.dear.pk)
+        counts = index.counts(min_rating=4)
+        self.assertEqual(dict(counts['price']), {'0-500': 1, '500-1000': 0, '1000-2500': 0, '2500-5000': 0, '5000-': 0})
+
+    def test_product_list_facets_follow_price_range(self):
+        facet_index.reload()
+        response = self.client.get(reverse('shop:product_list'), {'min_price': '500'})
+        price_counts = dict(response.context['facets']['price'])
+        self.assertEqual(price_counts['0-500'], 0)
+        self.assertEqual(price_counts['500-1000'], 1)
+        self.assertEqual(price_counts['5000-'], 1)
+
+    def test_custom_price_range_snaps_to_buckets(self):
+        facet_index.reload()
+        with self.assertNumQueries(1):
+            self.client.get(reverse('shop:product_list'), {'min_price': '600', 'max_price': '650'})
+        response = self.client.get(reverse('shop:product_list'), {'min_price': '600', 'max_price': '650'})
+        self.assertEqual(dict(response.context['facets']['price'])['500-1000'], 1)
+        self.assertEqual(dict(response.context['facets']['rating'])[4], 0)
+
+    def test_search_scope_is_reused_across_pages(self):
+        cache.clear()
+        facet_index.reload()
+        with mock.patch('shop.views.matching_ids', return_value=[self.cheap.pk]) as matching_ids:
+            for _ in range(2):
+                response = self.client.get(reverse('shop:product_list'), {'q': 'cheap'})
+        matching_ids.assert_called_once()
+        self.assertEqual(dict(response.context['facets']['price'])['0-500'], 1)
+
+    def test_index_only_sees_committed_writes(self):
+        facet_index.reload()
+        with self.captureOnCommitCallbacks(execute=True):
+            try:
+                with transaction.atomic():
+                    Product.objects.create(name='Rolled back', description='d', price=Decimal('7000.00'), stock=1)
+                    raise RuntimeError
+            except RuntimeError:
+                pass
+        self.assertEqual(dict(facet_index.counts()['price'])['5000-'], 1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Product.objects.create(name='Committed', description='d', price=Decimal('7000.00'), stock=1)
+        self.assertEqual(dict(facet_index.counts()['price'])['5000-'], 2)
+
+
+class ProductDetailConditionalTests(TestCase):
+    def test_etag_changes_after_recommendation_build(self):
+        product = Product.objects.create(name='Lamp', description='d', price=Decimal('10.00'), stock=1)
+        url = reverse('shop:product_detail', args=[product.pk])
+        etag = self.client.get(url)['ETag']
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        build_recommendations(full=True)
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_etag_changes_when_stock_is_reserved(self):
+        product = Product.objects.create(name='Lamp', description='d', price=Decimal('10.00'), stock=5)
+        url = reverse('shop:product_detail', args=[product.pk])
+        etag = self.client.get(url)['ETag']
+        Product.objects.filter(pk=product.pk).update(reserved_stock=5)
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'Out of stock')
+
+    def test_per_request_state_is_not_answered_from_timestamps(self):
+        product = Product.objects.create(name='Lamp', description='d', price=Decimal('10.00'), stock=5)
+        url = reverse('shop:product_detail', args=[product.pk])
+        anonymous = self.client.get(url)
+        self.assertFalse(anonymous.has_header('Last-Modified'))
+        self.assertEqual(self.client.get(url, HTTP_IF_MODIFIED_SINCE='Fri, 01 Jan 2100 00:00:00 GMT').status_code, 200)
+
+        user = User.objects.create_user(username='buyer@example.com', email='buyer@example.com', password='pw')
+        self.client.force_login(user)
+        etag = self.client.get(url, HTTP_IF_NONE_MATCH=anonymous['ETag'])['ETag']
+        self.assertNotEqual(etag, anonymous['ETag'])
+
+        self.client.get(reverse('shop:add_to_cart', args=[product.pk]))
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'has been added to your cart')
+
+
+class AddToCartTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='buyer@example.com', email='buyer@example.com', password='pw')
+        self.client.force_login(self.user)
+        self.product = Product.objects.create(name='Lamp', description='d', price=Decimal('10.00'), stock=3)
+        self.url = reverse('shop:add_to_cart', args=[self.product.pk])
+
+    def test_can_add_up_to_available_stock(self):
+        for _ in range(4):
+            self.client.get(self.url)
+        self.assertEqual(CartItem.objects.get(cart__user=self.user).quantity, 3)
+
+    def test_stock_held_by_others_is_not_available(self):
+        Product.objects.filter(pk=self.product.pk).update(reserved_stock=3)
+        self.client.get(self.url)
+        self.assertFalse(Cart.objects.filter(user=self.user, cartitem__isnull=False).exists())
+
+
+class AdminProductRatingTests(TestCase):
+    def setUp(self):
+        self.product = Product.objects.create(name='Lamp', description='d', price=Decimal('10.00'), stock=5)
+        self.buyer = User.objects.create_user(username='buyer@example.com', email='buyer@example.com', password='pw')
+        admin = User.objects.create_user(username='admin@example.com', email='admin@example.com', password='pw', is_staff=True)
+        self.client.force_login(admin)
+
+    def rate_during_admin_save(self, sender, instance, **kwargs):
+        # Lands between the admin view loading the product and writing it back.
+        pre_save.disconnect(self.rate_during_admin_save, sender=Product)
+        ProductRating.objects.create(product=self.product, user=self.buyer, rating=4)
+
+    def assert_rating_kept(self, url_name):
+        pre_save.connect(self.rate_during_admin_save, sender=Product)
+        self.addCleanup(pre_save.disconnect, self.rate_during_admin_save, sender=Product)
+        self.client.get(reverse(url_name, args=[self.product.pk]))
+        self.product.refresh_from_db()
+        self.assertEqual((self.product.rating_count, self.product.rating_avg, self.product.rating_4_count), (1, 4.0, 1))
+
+    def test_status_change_keeps_concurrent_rating(self):
+        self.assert_rating_kept('adminpanel:product_status_change')
+
+    def test_delete_keeps_concurrent_rating(self):
+        self.assert_rating_kept('adminpanel:product_delete')
+
+
+class ImageVariantTests(TestCase):
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+        settings_override = override_settings(MEDIA_ROOT=self.media_root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+    def create_product(self, mode='RGB', fmt='JPEG', name='lamp.jpg'):
+        buffer = io.BytesIO()
+        Image.new(mode, (2000, 1000), 'red').save(buffer, fmt)
+        return Product.objects.create(
+            name='Lamp', description='d', price=Decimal('10.00'), stock=1,
+            image=SimpleUploadedFile(name, buffer.getvalue()),
+        )
+
+    def test_upload_schedules_variant_job(self):
+        product = self.create_product()
+        job = Job.objects.get(name='shop.generate_image_variants')
+        self.assertEqual(job.payload, {'product_id': product.pk})
+
+    def test_generates_every_width_in_webp_and_jpeg(self):
+        product = self.create_product(mode='RGBA', fmt='PNG', name='lamp.png')
+        variants = generate_variants(product.pk)
+
+        storage = product.image.storage
+        for name, width in IMAGE_VARIANT_WIDTHS.items():
+            for fmt, pil_format in (('webp', 'WEBP'), ('jpeg', 'JPEG')):
+                with Image.open(storage.path(variants[name][fmt])) as image:
+                    self.assertEqual((image.format, image.size), (pil_format, (width, width // 2)))
+        product.refresh_from_db()
+        self.assertTrue(product.has_image_variants)
+        self.assertEqual(set(product.image_srcset), {'webp', 'jpeg'})
+
+    def test_existing_variants_are_not_regenerated(self):
+        product = self.create_product()
+        variants = generate_variants(product.pk)
+        with self.assertNumQueries(1):
+            self.assertEqual(generate_variants(product.pk), variants)
+
+
+class ImageVariantCacheTests(TestCase):
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+        cache.clear()
+
+    def test_index_cards_pick_up_new_variants(self):
+        with override_settings(MEDIA_ROOT=self.media_root):
+            buffer = io.BytesIO()
+            Image.new('RGB', (800, 800), 'red').save(buffer, 'JPEG')
+            product = Product.objects.create(
+                name='Red lamp', description='d', price=Decimal('10.00'), stock=1,
+                image=SimpleUploadedFile('red.jpg', buffer.getvalue(), content_type='image/jpeg'),
+            )
+            self.client.get(reverse('shop:index'))
+            variants = generate_variants(product.pk)
+            response = self.client.get(reverse('shop:index'))
+        self.assertContains(response, variants['medium']['jpeg'])
@@ -0,0 +1,68 @@
+import logging
+import math
+from collections import defaultdict
+from datetime import timedelta
+
+from django.db.models import Avg, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from orders.models import OrderItem, OrderStatus
+from shop.cache import CATALOG_TAG, invalidate_tags
+from shop.models import Product, ProductRating
+
+logger = logging.getLogger('shop')
+
+HALF_LIFE_DAYS = 7
+WINDOW_DAYS = 60
+RATING_PRIOR_COUNT = 10
+RATING_WEIGHT = 1.0
+
+
+def decayed_sales(now, half_life_days=HALF_LIFE_DAYS, window_days=WINDOW_DAYS):
+    # Sales are bucketed per product and day in SQL so the decay loop only
+    # sees one row per product-day, whatever the order volume is.
+    rows = OrderItem.objects.filter(created_at__gte=now - timedelta(days=window_days)).exclude(
+        order__status=OrderStatus.CANCELLED
+    ).annotate(day=TruncDate('created_at')).order_by().values('product_id', 'day').annotate(quantity=Sum('quantity'))
+    today = now.date()
+    decay = math.log(2) / half_life_days
+    sales = defaultdict(float)
+    for row in rows:
+        age = (today - row['day']).days
+        sales[row['product_id']] += row['quantity'] * math.exp(-decay * age)
+    return sales
+
+
+def trending_score(sales, rating_avg, rating_count, prior_mean, prior_count=RATING_PRIOR_COUNT):
+    # Ratings are shrunk towards the catalogue mean so a single 5-star review
+    # cannot outrank steady sellers.
+    rating = (rating_avg * rating_count + prior_mean * prior_count) / (rating_count + prior_count)
+    return math.log1p(sales) + RATING_WEIGHT * rating / 5
+
+
+def compute_trending_scores(half_life_days=HALF_LIFE_DAYS, window_days=WINDOW_DAYS, batch_size=1000):
+    now = timezone.now()
+    sales = decayed_sales(now, half_life_days=half_life_days, window_days=window_days)
+    prior_mean = ProductRating.objects.aggregate(mean=Avg('rating'))['mean'] or 0
+
+    updated = 0
+    batch = []
+    products = Product.objects.only('id', 'rating_avg', 'rating_count', 'trending_score').order_by('id')
+    for product in products.iterator(chunk_size=batch_size):
+        score = round(trending_score(sales.get(product.id, 0), product.rating_avg, product.rating_count, prior_mean), 6)
+        if score == product.trending_score:
+            continue
+        product.trending_score = score
+        batch.append(product)
+        if len(batch) >= batch_size:
+            Product.objects.bulk_update(batch, ['trending_score'])
+            updated += len(batch)
+            batch = []
+    if batch:
+        Product.objects.bulk_update(batch, ['trending_score'])
+        updated += len(batch)
+    if updated:
+        invalidate_tags(CATALOG_TAG)
+    logger.info(f"Trending scores computed: products_with_sales={len(sales)}, updated={updated}")
+    return updated
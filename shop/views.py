@@ -1,57 +1,113 @@
+import hashlib
 import logging
+from decimal import Decimal, InvalidOperation
 
 from django.shortcuts import render
 from django.shortcuts import get_object_or_404, redirect
 from django.contrib import messages
-from django.db.models import Avg
 from django.db import transaction
 from django.contrib.auth.decorators import login_required
-from django.db.models.functions import Random
+from django.views.decorators.http import condition
 
 from shop.models import Product
 from users.models import Cart, CartItem
 from shop.models import ProductRating
+from shop.forms import ProductRatingForm
+from shop.search import matching_ids, search_products
+from shop.facets import PRICE_BUCKETS, RATING_THRESHOLDS, bitset_from_ids, facet_index, price_bucket_range
+from shop.pagination import KeysetPaginator
+from shop.sampling import product_sampler
+from shop.cache import CATALOG_TAG, get_or_build, render_product_cards
+from shop.conditional import product_etag
+from orders.recommendations import recommended_products
+from orders.reservations import available_to
 
 logger = logging.getLogger('shop')
 
+PRODUCT_SORTS = {
+    'relevance': ('search_rank', 'id'),
+    'newest': ('-created_at', '-id'),
+    'price_asc': ('price', 'id'),
+    'price_desc': ('-price', '-id'),
+}
+
 def index(request):
     logger.info(f"Index page accessed by {request.META.get('REMOTE_ADDR', 'unknown')}")
-    new_arrivals = Product.objects.filter(is_active=True, is_deleted=False).order_by('-created_at')[:5]
-    trending_items = Product.objects.filter(is_active=True, is_deleted=False).annotate(avg_rating=Avg('ratings__rating')).order_by('-avg_rating')[:5]
-    special_for_you = Product.objects.filter(is_active=True, is_deleted=False).order_by(Random())[:5]
+    new_arrivals = get_or_build('new_arrivals', [CATALOG_TAG], lambda: list(
+        Product.objects.filter(is_active=True, is_deleted=False).order_by('-created_at')[:5]))
+    trending_items = get_or_build('trending_items', [CATALOG_TAG], lambda: list(
+        Product.objects.filter(is_active=True, is_deleted=False).order_by('-trending_score', '-id')[:5]))
+    special_for_you = product_sampler.sample(5)
     context = {
-        'new_arrivals': new_arrivals,
-        'trending_items': trending_items,
-        'special_for_you': special_for_you
+        'new_arrivals': render_product_cards(new_arrivals),
+        'trending_items': render_product_cards(trending_items),
+        'special_for_you': render_product_cards(special_for_you)
     }
     return render(request, 'shop/index.html', context)
 
 
+def _parse_price(value):
+    try:
+        price = Decimal(value)
+    except (TypeError, InvalidOperation):
+        return None
+    return price if price.is_finite() and price >= 0 else None
+
+
 def product_list(request):
     products = Product.objects.filter(is_active=True, is_deleted=False)
 
     q = request.GET.get('q')
+    facet_scope = None
     if q:
-        products = products.filter(name__icontains=q)
+        products = search_products(products, q)
+        # The match set is kept per catalog version so paging through results
+        # does not rebuild it.
+        search_key = hashlib.sha256(q.strip().lower().encode()).hexdigest()
+        facet_scope = get_or_build(f'search_scope:{search_key}', [CATALOG_TAG], lambda: bitset_from_ids(matching_ids(q)))
         logger.info(f"Product search performed: query='{q}'")
     
-    min_price = request.GET.get('min_price')
-    max_price = request.GET.get('max_price')
+    min_price = _parse_price(request.GET.get('min_price'))
+    max_price = _parse_price(request.GET.get('max_price'))
     min_rating = request.GET.get('min_rating')
-    if min_price:
+    price_bucket = request.GET.get('price')
+    if min_price is not None:
         products = products.filter(price__gte=min_price)
-    if max_price:
+    if max_price is not None:
         products = products.filter(price__lte=max_price)
+    if price_bucket in PRICE_BUCKETS:
+        lower, upper = price_bucket_range(price_bucket)
+        if lower is not None:
+            products = products.filter(price__gte=lower)
+        if upper is not None:
+            products = products.filter(price__lt=upper)
+    else:
+        price_bucket = None
+    min_rating = int(min_rating) if min_rating and min_rating.isdigit() and int(min_rating) in RATING_THRESHOLDS else None
     if min_rating:
-        products = products.filter(ratings__rating__gte=min_rating)
+        products = products.filter(rating_avg__gte=min_rating)
+
+    sort = request.GET.get('sort')
+    if sort not in PRODUCT_SORTS or (sort == 'relevance' and not q):
+        sort = 'relevance' if q else 'newest'
+    page = KeysetPaginator(products, PRODUCT_SORTS[sort]).get_page(request.GET.get('cursor'))
 
-    logger.info(f"Product list viewed: count={products.count()}, filters={{'min_price': {min_price}, 'max_price': {max_price}, 'min_rating': {min_rating}}}")
+    logger.info(f"Product list viewed: page_count={len(page)}, sort={sort}, filters={{'min_price': {min_price}, 'max_price': {max_price}, 'price': {price_bucket}, 'min_rating': {min_rating}}}")
     context = {
-        'products': products
+        'products': page,
+        'product_cards': render_product_cards(page),
+        'page': page,
+        'sort': sort,
+        'facets': facet_index.counts(
+            price_bucket=price_bucket, min_rating=min_rating, restrict_to=facet_scope, min_price=min_price, max_price=max_price
+        ),
+        'price_bucket': price_bucket,
+        'min_rating': min_rating,
     }
     return render(request, 'shop/product_list.html', context)
 
 
+@condition(etag_func=product_etag)
 def product_detail(request, product_id):
     try:
         product = Product.objects.get(id=product_id, is_active=True, is_deleted=False)
@@ -60,12 +116,9 @@ def product_detail(request, product_id):
         logger.error(f"Product not found: product_id={product_id}")
         messages.error(request, 'Product not found')
         return redirect('shop:product_list')
-    avg_rating = product.ratings.aggregate(Avg('rating'))['rating__avg'] or 0
-    count_rating = product.ratings.count() or 0
     context = {
         'product': product,
-        'avg_rating': avg_rating,
-        'count_rating': count_rating
+        'recommended_cards': render_product_cards(recommended_products([product.id])),
     }
     return render(request, 'shop/product_detail.html', context)
 
@@ -79,17 +132,18 @@ def add_to_cart(request, product_id):
         messages.error(request, 'Product not found')
         return redirect('shop:product_list')
     cart, created = Cart.objects.get_or_create(user=request.user)
+    available = available_to(request.user, product)
 
-    if product.stock <= 0:
+    if available <= 0:
         logger.warning(f"Out of stock attempt: product_id={product_id}, product_name={product.name}, user={request.user.email}")
         messages.error(request, 'Sorry, this product is out of stock.')
         return redirect('shop:product_detail', product_id=product_id)
     
     with transaction.atomic():
         cart_item, created = CartItem.objects.get_or_create(cart=cart, product=product, defaults={'quantity': 1})
-        if not created and cart_item.quantity + 1 >= product.stock:
-            logger.warning(f"Stock limit reached: product_id={product_id}, stock={product.stock}, user={request.user.email}")
-            messages.error(request, f'Sorry, only {product.stock} {product.name}(s) left in stock.')
+        if not created and cart_item.quantity + 1 > available:
+            logger.warning(f"Stock limit reached: product_id={product_id}, available={available}, user={request.user.email}")
+            messages.error(request, f'Sorry, only {available} {product.name}(s) left in stock.')
             return redirect('shop:product_detail', product_id=product_id)
         if not created:
             cart_item.quantity += 1
@@ -109,7 +163,12 @@ def rate_product(request, product_id):
         return redirect('shop:product_list')
     if request.method == 'POST':
         order_id = request.POST.get('order_id')
-        rating = request.POST.get('rating')
+        form = ProductRatingForm(request.POST)
+        if not form.is_valid():
+            logger.warning(f"Invalid rating submitted: product_id={product_id}, errors={form.errors}, user={request.user.email}")
+            messages.error(request, 'Please choose a rating between 1 and 5.')
+            return redirect('orders:order_detail', order_id=order_id)
+        rating = form.cleaned_data['rating']
         ProductRating.objects.update_or_create(
                 product=product, 
                 user=request.user, 
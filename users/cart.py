@@ -0,0 +1,36 @@
+from collections import namedtuple
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Case, F, IntegerField, Q, Value, When
+
+from orders.reservations import held_by
+from users.models import CartItem
+
+CartSummary = namedtuple('CartSummary', ['items', 'total', 'clamped', 'removed'])
+
+
+def reconcile_cart(user):
+    cart_items = CartItem.objects.filter(cart__user=user)
+    with transaction.atomic():
+        # Stock held by other checkouts is not available; the user's own hold is.
+        available = cart_items.annotate(
+            available=F('product__stock') - F('product__reserved_stock') + held_by(user)
+        )
+        removed_ids = list(available.filter(
+            Q(quantity__lte=0) | Q(available__lte=0) | Q(product__is_active=False) | Q(product__is_deleted=True)
+        ).values_list('id', flat=True))
+        removed = CartItem.objects.filter(pk__in=removed_ids).delete()[0] if removed_ids else 0
+        over_stock = list(available.filter(quantity__gt=F('available')).values_list(
+            'id', 'product_id', 'product__name', 'available'
+        ))
+        clamped = [row[1:] for row in over_stock]
+        if over_stock:
+            CartItem.objects.filter(pk__in=[row[0] for row in over_stock]).update(quantity=Case(
+                *[When(pk=item_id, then=Value(quantity)) for item_id, _, _, quantity in over_stock],
+                output_field=IntegerField(),
+            ))
+
+    items = list(cart_items.select_related('product').annotate(subtotal=F('quantity') * F('product__price')).order_by('id'))
+    total = sum((item.subtotal for item in items), Decimal('0'))
+    return CartSummary(items, total, clamped, removed)
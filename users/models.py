@@ -22,6 +22,11 @@ class User(AbstractUser):
     def get_short_name(self):
         return self.name
 
+    class Meta(AbstractUser.Meta):
+        indexes = [
+            models.Index(fields=['date_joined', 'id'], name='user_joined_keyset_idx'),
+        ]
+
 
 class Address(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE)
@@ -3,13 +3,15 @@ import logging
 from django.shortcuts import render, get_object_or_404
 from django.shortcuts import redirect
 from django.contrib.auth import login, logout, get_user_model
-from django.db.models import F, Sum
 from django.contrib import messages
 from django.contrib.auth.decorators import login_required, user_passes_test
 from django.views.decorators.cache import never_cache
 
 from users.forms import UserRegistrationForm, UserLoginForm
 from users.models import Cart, CartItem
+from users.cart import reconcile_cart
+from orders.recommendations import recommended_products
+from shop.cache import render_product_cards
 
 User = get_user_model()
 
@@ -72,26 +74,20 @@ def cart_view(request):
     logger.info(f"Cart viewed by user: {request.user.email}")
     cart, created = Cart.objects.get_or_create(user=request.user)
     
-    cart_items = CartItem.objects.filter(cart=cart)
-    for cart_item in cart_items:
-        if cart_item.product.stock < cart_item.quantity:
-            cart_item.quantity = cart_item.product.stock
-            cart_item.save()
-            logger.warning(f"Stock limit reached: product_id={cart_item.product.id}, stock={cart_item.product.stock}, user={request.user.email}")
-            messages.error(request, f'Sorry, only {cart_item.product.stock} {cart_item.product.name}(s) left in stock.')
-        if cart_item.quantity <= 0 or not cart_item.product.is_active or cart_item.product.is_deleted:
-            cart_item.delete()
-            logger.warning(f"Item deleted from cart: product_id={cart_item.product.id}, user={request.user.email}")
-            messages.error(request, 'Some items in your cart are no longer available.')
-    
-    cart_items = CartItem.objects.filter(cart=cart).annotate(subtotal=F('quantity') * F('product__price'))
-    total = cart_items.aggregate(total=Sum(F('subtotal')))['total']
-    if total is None:
-        total = 0
+    summary = reconcile_cart(request.user)
+    for product_id, name, stock in summary.clamped:
+        logger.warning(f"Stock limit reached: product_id={product_id}, stock={stock}, user={request.user.email}")
+        messages.error(request, f'Sorry, only {stock} {name}(s) left in stock.')
+    if summary.removed:
+        logger.warning(f"Items deleted from cart: count={summary.removed}, user={request.user.email}")
+        messages.error(request, 'Some items in your cart are no longer available.')
+
+    cart_items = summary.items
     context = {
         'cart': cart,
         'cart_items': cart_items if cart_items else None,
-        'total': total
+        'total': summary.total,
+        'recommended_cards': render_product_cards(recommended_products({item.product_id for item in cart_items})) if cart_items else [],
     }
     return render(request, 'users/cart.html', context)
 